@@ -2,31 +2,91 @@
 
 import os
 import re
+import sys
+import queue
+import asyncio
+import logging
+import logging.handlers
 import time
+import random
+import pickle
+import hashlib
 import typer
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import yaml
 from typing import Optional
+
+# Prefer the libyaml C binding; same safety as SafeLoader but much faster to parse
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
 from src.state.state import EssayState
 from src.utils.ollama_client import OllamaClient
-from src.loaders.pdf_loader import load_pdfs_from_directory
+from src.utils.cached_ollama_client import CachedOllamaClient
+from src.utils.cache import write_cache_file
+from src.loaders.pdf_loader import iter_pdf_chunks
 from src.graph.workflow import create_workflow
-from src.utils.checkpoint import save_checkpoint, save_intermediate_essay
+from src.utils.checkpoint import save_checkpoint, save_intermediate_essay, save_checkpoint_batch
 from src.utils.tracking.langfuse_tracker import LangfuseTracker
 
+logger = logging.getLogger("essay")
+
 app = typer.Typer(help="Academic Essay Generator - Multi-agent system for generating PhD-level essays")
 
+# Matches ${VAR} placeholders in config values
+_ENV_RE = re.compile(r'\$\{([^}]+)\}')
+
+# Nodes whose output is checkpointed to disk
+CHECKPOINT_NODES = frozenset(("outline", "writer", "citation", "review"))
+
+# Parsed configs are cached here, keyed by path, mtime and size
+CONFIG_CACHE_DIR = Path.home() / ".cache" / "essaygen"
+
+
+def _load_yaml_cached(path: Path) -> dict:
+    """
+    Load a YAML file, reusing a pickled copy from previous runs if the file is unchanged.
+    
+    Args:
+        path: Path to the YAML file
+        
+    Returns:
+        Parsed YAML content
+    """
+    stat = path.stat()
+    key = f"{path.resolve()}:{stat.st_mtime_ns}:{stat.st_size}"
+    cache_file = CONFIG_CACHE_DIR / f"{hashlib.sha256(key.encode()).hexdigest()}.pkl"
+    
+    try:
+        with open(cache_file, "rb") as f:
+            return pickle.load(f)
+    except Exception:
+        pass
+    
+    with open(path, "r") as f:
+        data = yaml.load(f, Loader=YamlLoader)
+    
+    write_cache_file(cache_file, pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL))
+    
+    return data
+
 
 def _substitute_env_vars(value: str) -> str:
     """Substitute environment variables in config values (e.g., ${VAR})."""
     if not isinstance(value, str):
         return value
     
+    # Most values have no placeholders; skip the regex entirely
+    if '${' not in value:
+        return value
+    
     def replace_env(match):
         var_name = match.group(1)
         return os.getenv(var_name, match.group(0))
     
-    return re.sub(r'\$\{([^}]+)\}', replace_env, value)
+    return _ENV_RE.sub(replace_env, value)
 
 
 def _initialize_tracker(config_data: dict):
@@ -49,12 +109,16 @@ def _initialize_tracker(config_data: dict):
                 public_key=public_key if public_key and not public_key.startswith("${") else None,
                 secret_key=secret_key if secret_key and not secret_key.startswith("${") else None,
                 host=host,
-                enabled=True
+                enabled=True,
+                flush_at=langfuse_config.get("flush_at", 50),
+                flush_interval=langfuse_config.get("flush_interval", 10.0)
             )
-            if tracker.is_enabled():
-                typer.echo("✓ Langfuse tracking enabled\n")
-            else:
+            if not tracker.is_enabled():
+                # Drop the disabled tracker here, so the client and workflow
+                # take their no-tracker paths instead of checking it per call
                 typer.echo("⚠️  Langfuse tracking disabled (missing credentials)\n", err=True)
+                return None
+            typer.echo("✓ Langfuse tracking enabled\n")
             return tracker
         except Exception as e:
             typer.echo(f"⚠️  Warning: Failed to initialize tracker: {str(e)}\n", err=True)
@@ -64,6 +128,70 @@ def _initialize_tracker(config_data: dict):
         return None
 
 
+def _apply_trace_sampling(tracker, config_data: dict):
+    """
+    Apply head sampling to the tracker for this run.
+    
+    Returns a (tracker, tail_tracker) pair. When the run is sampled out, tracker is
+    None and tail_tracker is kept (if tail sampling is configured) so failed or slow
+    runs can still be promoted to a summary trace afterwards.
+    """
+    if tracker is None or not tracker.is_enabled():
+        return tracker, None
+    
+    tracking_config = config_data.get("tracking", {})
+    sample_rate = tracking_config.get("sample_rate", 1.0)
+    if random.random() < sample_rate:
+        return tracker, None
+    
+    if tracking_config.get("tail_sample_on"):
+        typer.echo("ℹ️  Run not sampled for tracing (errors/slow runs will still be recorded)\n")
+        return None, tracker
+    
+    typer.echo("ℹ️  Run not sampled for tracing\n")
+    tracker.shutdown()
+    return None, None
+
+
+def _promote_trace(tail_tracker, reason: str, config_data: dict, metadata: dict) -> None:
+    """Record a summary trace for a sampled-out run if tail sampling covers the reason."""
+    if tail_tracker is None:
+        return
+    if reason not in config_data.get("tracking", {}).get("tail_sample_on", []):
+        return
+    
+    try:
+        with tail_tracker.trace_context(
+            name="essay_generation_workflow",
+            metadata={**metadata, "tail_sampled": reason}
+        ):
+            pass
+        tail_tracker.shutdown()
+    except Exception as e:
+        typer.echo(f"⚠️  Warning: Failed to record tail-sampled trace: {str(e)}", err=True)
+
+
+def _start_agent_logging() -> logging.handlers.QueueListener:
+    """
+    Route agent progress logs to stdout through a background listener thread.
+    
+    Agents log to the "essay" logger; records are queued so the workflow never
+    blocks on terminal I/O. Stop the returned listener to flush pending output.
+    """
+    log_queue = queue.SimpleQueue()
+    
+    logger = logging.getLogger("essay")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    logger.handlers[:] = [logging.handlers.QueueHandler(log_queue)]
+    
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    listener = logging.handlers.QueueListener(log_queue, handler)
+    listener.start()
+    return listener
+
+
 @app.callback(invoke_without_command=True)
 def main(
     topic: str = typer.Option(..., "--topic", "-t", help="Essay topic"),
@@ -71,6 +199,8 @@ def main(
     literature: str = typer.Option(..., "--literature", "-l", help="Path to directory with PDFs"),
     output: str = typer.Option(..., "--output", "-o", help="Output path for essay.md"),
     config: Optional[str] = typer.Option(None, "--config", help="Path to config.yaml (default: ./config.yaml)"),
+    tracking: Optional[bool] = typer.Option(None, "--tracking/--no-tracking", help="Override tracking.enabled from config"),
+    checkpoints: Optional[bool] = typer.Option(None, "--checkpoints/--no-checkpoints", help="Override checkpointing.enabled from config"),
 ):
     """
     Generate an academic essay using the multi-agent pipeline.
@@ -85,21 +215,41 @@ def main(
         typer.echo(f"Error: Config file not found: {config_path}", err=True)
         raise typer.Exit(1)
     
-    with open(config_path, "r") as f:
-        config_data = yaml.safe_load(f)
+    config_data = _load_yaml_cached(config_path)
+    
+    # Apply CLI feature-flag overrides
+    if tracking is not None:
+        config_data.setdefault("tracking", {})["enabled"] = tracking
+    if checkpoints is None:
+        checkpoints = config_data.get("checkpointing", {}).get("enabled", True)
     
     # Initialize tracker
     tracker = _initialize_tracker(config_data)
+    tracker, tail_tracker = _apply_trace_sampling(tracker, config_data)
     
     # Initialize Ollama client with tracker
     ollama_config = config_data.get("ollama", {})
-    ollama_client = OllamaClient(
+    client_kwargs = dict(
         model=ollama_config.get("model", "llama3.1:8b-instruct-q4_K_M"),
         base_url=ollama_config.get("base_url", "http://localhost:11434"),
         timeout=ollama_config.get("timeout", 300),
-        tracker=tracker
+        tracker=tracker,
+        max_parallel=ollama_config.get("num_parallel", 1),
+        options=ollama_config.get("options")
     )
     
+    # Optionally reuse LLM responses for identical requests across runs
+    cache_config = config_data.get("llm_cache", {})
+    if cache_config.get("enabled", False):
+        cache_dir = cache_config.get("dir")
+        ollama_client = CachedOllamaClient(
+            **client_kwargs,
+            cache_dir=Path(cache_dir).expanduser() if cache_dir else None
+        )
+        typer.echo(f"✓ LLM response cache enabled ({ollama_client.cache_dir})\n")
+    else:
+        ollama_client = OllamaClient(**client_kwargs)
+    
     # Load criteria
     criteria_path = Path(criteria)
     if not criteria_path.exists():
@@ -117,11 +267,29 @@ def main(
     
     typer.echo(f"\n📚 Loading PDFs from {literature_path}...")
     chunking_config = config_data.get("chunking", {})
-    literature_chunks = load_pdfs_from_directory(
-        literature_path,
-        chunk_size=chunking_config.get("chunk_size", 1000),
-        chunk_overlap=chunking_config.get("chunk_overlap", 100)
-    )
+    chunk_cache_dir = None
+    if chunking_config.get("cache", False):
+        chunk_cache_dir = Path(chunking_config.get("cache_dir") or "~/.cache/essaygen/chunks").expanduser()
+    
+    # Load the model into Ollama while PDFs are being extracted; extraction
+    # stays on the main thread, which starts the loader's worker processes
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        warmup_future = executor.submit(ollama_client.warmup)
+        # Stream chunks straight into the (read-only) tuple kept in state
+        literature_chunks = tuple(iter_pdf_chunks(
+            literature_path,
+            chunk_size=chunking_config.get("chunk_size", 1000),
+            chunk_overlap=chunking_config.get("chunk_overlap", 100),
+            cache_dir=chunk_cache_dir
+        ))
+    
+    # Calls no longer probe the server first, so surface an unreachable Ollama here
+    if not warmup_future.result() and not ollama_client.check_connection():
+        typer.echo(
+            f"Warning: Cannot connect to Ollama at {ollama_client.base_url}. "
+            "Please ensure Ollama is running and the model is available.",
+            err=True
+        )
     
     if not literature_chunks:
         typer.echo("Warning: No literature chunks loaded. Continuing with empty literature.", err=True)
@@ -137,6 +305,7 @@ def main(
         topic=topic,
         criteria=criteria_text,
         target_length=target_length,
+        # Read-only after loading; a tuple is shared rather than copied between nodes
         literature_chunks=literature_chunks
     )
     
@@ -146,18 +315,22 @@ def main(
         ollama_client=ollama_client,
         review_threshold=review_config.get("threshold", 0.7),
         max_revision_cycles=review_config.get("max_revision_cycles", 2),
-        tracker=tracker
+        tracker=tracker,
+        fuse_research_outline=essay_config.get("fuse_research_outline", False),
+        batch_sections=essay_config.get("batch_sections", False)
     )
     
     # Set up checkpoint directory (next to output file)
     output_path = Path(output)
-    checkpoint_dir = output_path.parent / f"{output_path.stem}_checkpoints"
+    checkpoint_dir = output_path.parent / f"{output_path.stem}_checkpoints" if checkpoints else None
     
     # Run workflow
     typer.echo("🚀 Starting essay generation pipeline...\n")
-    typer.echo(f"💾 Checkpoints will be saved to: {checkpoint_dir}\n")
+    if checkpoint_dir:
+        typer.echo(f"💾 Checkpoints will be saved to: {checkpoint_dir}\n")
     
     workflow_start_time = time.time()
+    log_listener = _start_agent_logging()
     
     # Prepare trace metadata
     trace_metadata = {
@@ -171,18 +344,25 @@ def main(
     final_state_dict = None
     last_state_dict = None
     
+    # Built once from the final state dict and reused for tracing and output
+    final_state = None
+    word_count = 0
+    
     # Use trace context manager if tracking is enabled
     try:
         if tracker and tracker.is_enabled() and hasattr(tracker, 'trace_context'):
             # Wrap entire workflow in trace context
-            with tracker.trace_context(name="essay_generation_workflow", metadata=trace_metadata) as trace:
-                final_state_dict, last_state_dict = _run_workflow(
+            with tracker.trace_context(
+                name="essay_generation_workflow",
+                metadata=trace_metadata
+            ) as trace:
+                final_state_dict, last_state_dict = asyncio.run(_run_workflow(
                     workflow, initial_state, checkpoint_dir
-                )
+                ))
                 
                 # Update trace with final metadata if successful
                 if trace and final_state_dict:
-                    final_state = EssayState(**final_state_dict)
+                    final_state = EssayState.model_construct(**final_state_dict)
                     word_count = len(final_state.final_essay.split())
                     workflow_duration = time.time() - workflow_start_time
                     final_metadata = {
@@ -192,18 +372,27 @@ def main(
                         "total_duration_seconds": workflow_duration,
                         "success": True
                     }
-                    trace.update(metadata=final_metadata)
+                    tracker.buffer_update(final_metadata)
         else:
             # Run without tracking
-            final_state_dict, last_state_dict = _run_workflow(
+            final_state_dict, last_state_dict = asyncio.run(_run_workflow(
                 workflow, initial_state, checkpoint_dir
-            )
+            ))
+            
+            workflow_duration = time.time() - workflow_start_time
+            slow_threshold = config_data.get("tracking", {}).get("slow_threshold_seconds", 1800)
+            if workflow_duration > slow_threshold:
+                _promote_trace(tail_tracker, "slow", config_data, {
+                    **trace_metadata,
+                    "total_duration_seconds": workflow_duration,
+                    "success": True
+                })
     except KeyboardInterrupt:
         typer.echo("\n\n⚠️  Generation interrupted by user", err=True)
         # Try to save last checkpoint if available
-        if 'last_state_dict' in locals() and last_state_dict:
+        if checkpoint_dir and 'last_state_dict' in locals() and last_state_dict:
             try:
-                last_state = EssayState(**last_state_dict)
+                last_state = EssayState.model_construct(**last_state_dict)
                 save_checkpoint(last_state, checkpoint_dir, "interrupted")
                 save_intermediate_essay(last_state, checkpoint_dir, "interrupted")
                 typer.echo(f"💾 Last checkpoint saved to: {checkpoint_dir}")
@@ -212,27 +401,45 @@ def main(
         raise typer.Exit(1)
     except Exception as e:
         typer.echo(f"\n❌ Error during generation: {str(e)}", err=True)
+        _promote_trace(tail_tracker, "error", config_data, {
+            **trace_metadata,
+            "total_duration_seconds": time.time() - workflow_start_time,
+            "error": str(e),
+            "success": False
+        })
         # Try to save last checkpoint if available
-        if 'last_state_dict' in locals() and last_state_dict:
+        if checkpoint_dir and 'last_state_dict' in locals() and last_state_dict:
             try:
-                last_state = EssayState(**last_state_dict)
+                last_state = EssayState.model_construct(**last_state_dict)
                 save_checkpoint(last_state, checkpoint_dir, "error")
                 save_intermediate_essay(last_state, checkpoint_dir, "error")
                 typer.echo(f"💾 Last checkpoint saved to: {checkpoint_dir}")
             except Exception as save_error:
                 typer.echo(f"  ⚠️  Could not save checkpoint: {str(save_error)}", err=True)
         raise typer.Exit(1)
+    finally:
+        ollama_client.close()
+        
+        # Flush queued agent output before printing anything else
+        log_listener.stop()
+        
+        # Drain background tracking flushes before the process exits
+        if tracker:
+            tracker.shutdown()
+        if tail_tracker:
+            tail_tracker.shutdown()
     
     # Handle final output and display
     if final_state_dict:
-        final_state = EssayState(**final_state_dict)
+        if final_state is None:
+            final_state = EssayState.model_construct(**final_state_dict)
+            word_count = len(final_state.final_essay.split())
         
         # Save final output
         output_path.parent.mkdir(parents=True, exist_ok=True)
         with open(output_path, "w", encoding="utf-8") as f:
             f.write(final_state.final_essay)
         
-        word_count = len(final_state.final_essay.split())
         typer.echo(f"\n✅ Essay generated successfully!")
         typer.echo(f"   Output: {output_path}")
         typer.echo(f"   Word count: {word_count}")
@@ -243,8 +450,28 @@ def main(
         raise typer.Exit(1)
 
 
-def _run_workflow(workflow, initial_state, checkpoint_dir):
-    """Run the workflow and return final state."""
+def _write_checkpoint(state: EssayState, checkpoint_dir: Path, node_name: str) -> None:
+    """
+    Save the checkpoint and intermediate essay for a node (runs on the checkpoint thread).
+    
+    Messages go through the "essay" logger, so they queue in order with agent output.
+    """
+    try:
+        # Save full state checkpoint, plus the intermediate essay once sections exist
+        _, essay_file = save_checkpoint_batch(
+            state,
+            checkpoint_dir,
+            node_name,
+            include_essay=node_name in ["writer", "citation", "review"]
+        )
+        if essay_file:
+            logger.info("  💾 Saved intermediate essay: %s", essay_file.name)
+    except Exception as e:
+        logger.warning("  ⚠️  Warning: Failed to save checkpoint: %s", e)
+
+
+async def _run_workflow(workflow, initial_state, checkpoint_dir):
+    """Run the workflow and return final state (checkpoint_dir=None disables checkpoints)."""
     final_state_dict = None
     last_state_dict = None
     
@@ -254,42 +481,55 @@ def _run_workflow(workflow, initial_state, checkpoint_dir):
     # Track which nodes we've checkpointed to avoid duplicates
     checkpointed_nodes = set()
     
-    # Stream workflow execution to capture intermediate states
-    for event in workflow.stream(initial_state):
-        # event is a dict with node names as keys
-        for node_name, state_dict in event.items():
-            last_node = node_name
-            
-            # Convert dict to EssayState for checkpointing
-            current_state = EssayState(**state_dict)
-            
-            # Save checkpoints after key nodes
-            if node_name in ["outline", "writer", "citation", "review"]:
+    # Nodes stream only their updates; merge them into a running state dict
+    current_state_dict = dict(initial_state)
+    
+    # Checkpoints are written on a single background thread so disk I/O
+    # doesn't hold up the next node; shutdown() drains pending writes
+    checkpoint_executor = ThreadPoolExecutor(max_workers=1)
+    
+    try:
+        # Stream workflow execution to capture intermediate states
+        async for event in workflow.astream(initial_state):
+            # event is a dict with node names as keys
+            for node_name, updates in event.items():
+                last_node = node_name
+                if updates:
+                    current_state_dict.update(updates)
+                state_dict = current_state_dict
+                
+                # Store state for checkpointing on error
+                final_state_dict = state_dict
+                last_state_dict = state_dict
+                
+                # Save checkpoints after key nodes only (if checkpointing is enabled)
+                if checkpoint_dir is None or node_name not in CHECKPOINT_NODES:
+                    continue
+                
                 # Only checkpoint once per revision cycle for each node
-                checkpoint_key = f"{node_name}_rev{current_state.revision_count}"
-                if checkpoint_key not in checkpointed_nodes:
-                    try:
-                        # Save full state checkpoint
-                        checkpoint_file = save_checkpoint(current_state, checkpoint_dir, node_name)
-                        
-                        # Save intermediate essay if sections are available
-                        if node_name in ["writer", "citation", "review"] and current_state.sections:
-                            essay_file = save_intermediate_essay(current_state, checkpoint_dir, node_name)
-                            if essay_file:
-                                typer.echo(f"  💾 Saved intermediate essay: {essay_file.name}")
-                        
-                        checkpointed_nodes.add(checkpoint_key)
-                    except Exception as e:
-                        typer.echo(f"  ⚠️  Warning: Failed to save checkpoint: {str(e)}", err=True)
-            
-            # Store state for checkpointing on error
-            final_state_dict = state_dict
-            last_state_dict = state_dict
+                checkpoint_key = f"{node_name}_rev{state_dict.get('revision_count', 0)}"
+                if checkpoint_key in checkpointed_nodes:
+                    continue
+                
+                # Convert dict to EssayState for checkpointing; the workflow produced
+                # this dict, so skip Pydantic re-validation
+                current_state = EssayState.model_construct(**state_dict)
+                
+                # Deep copy so later nodes can't mutate the state mid-write
+                checkpoint_executor.submit(
+                    _write_checkpoint,
+                    current_state.model_copy(deep=True),
+                    checkpoint_dir,
+                    node_name
+                )
+                checkpointed_nodes.add(checkpoint_key)
+    finally:
+        checkpoint_executor.shutdown(wait=True)
     
     # If streaming didn't work or returned nothing, fall back to invoke
     if final_state_dict is None:
         typer.echo("  ⚠️  Streaming completed, using invoke as fallback...")
-        final_state_dict = workflow.invoke(initial_state)
+        final_state_dict = await workflow.ainvoke(initial_state)
     
     if final_state_dict is None:
         typer.echo("Error: Workflow completed but no final state returned", err=True)
@@ -1,15 +1,24 @@
 """CitationAgent - Manages references and ensures proper citation format."""
 
+import asyncio
+import logging
+from itertools import chain
 from typing import Dict, Any, List
 from src.state.state import EssayState
 from src.utils.ollama_client import OllamaClient
 from src.utils.prompts import CITATION_AGENT_SYSTEM_PROMPT, get_citation_prompt
+from src.state.schemas import CITATION_JSON_SCHEMA
 
+logger = logging.getLogger("essay")
 
-def citation_agent(state: EssayState, ollama_client: OllamaClient) -> Dict[str, Any]:
+
+async def citation_agent(state: EssayState, ollama_client: OllamaClient) -> Dict[str, Any]:
     """
     CitationAgent processes sections to identify citation needs and format them in APA style.
     
+    Each section is analysed by its own LLM call; the calls run concurrently and
+    their citations and bibliographies are merged afterwards.
+    
     Args:
         state: Current essay state
         ollama_client: Ollama client instance
@@ -17,35 +26,60 @@ def citation_agent(state: EssayState, ollama_client: OllamaClient) -> Dict[str,
     Returns:
         Updated state dictionary with citations
     """
-    print("📚 CitationAgent: Processing citations...")
+    logger.info("📚 CitationAgent: Processing citations...")
     
     if not state.sections:
-        print("  Warning: No sections available for citation")
+        logger.warning("  Warning: No sections available for citation")
         return {"citations": []}
     
     try:
-        # Generate prompt
-        prompt = get_citation_prompt(state.sections, state.literature_chunks)
-        
-        # Get structured response
-        citation_data = ollama_client.generate_structured(
-            prompt=prompt,
-            system=CITATION_AGENT_SYSTEM_PROMPT,
-            temperature=0.3
+        # Generate one prompt per section and run them concurrently
+        semaphore = asyncio.Semaphore(ollama_client.max_parallel)
+        
+        async def cite_section(name: str, content: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await asyncio.to_thread(
+                    ollama_client.generate_structured,
+                    prompt=get_citation_prompt({name: content}, ()),
+                    system=CITATION_AGENT_SYSTEM_PROMPT,
+                    temperature=0.3,
+                    schema=CITATION_JSON_SCHEMA
+                )
+        
+        results = await asyncio.gather(
+            *(cite_section(name, content) for name, content in state.sections.items()),
+            return_exceptions=True
         )
         
-        citations = citation_data.get("citations", [])
-        bibliography = citation_data.get("bibliography", [])
+        citations: List[Dict[str, Any]] = []
+        bibliography: List[Dict[str, Any]] = []
+        seen_bibliography = set()
+        
+        for section_name, citation_data in zip(state.sections, results):
+            if isinstance(citation_data, Exception):
+                logger.error("  ✗ Error processing citations for %s: %s", section_name, citation_data)
+                continue
+            
+            citations.extend(citation_data.get("citations", []))
+            
+            # The same source is usually cited from several sections
+            for bib in citation_data.get("bibliography", []):
+                key = (bib.get("author"), bib.get("year"), bib.get("title"))
+                if key not in seen_bibliography:
+                    seen_bibliography.add(key)
+                    bibliography.append(bib)
         
         # Combine citations and bibliography
-        all_citations = citations + [{"type": "bibliography", **bib} for bib in bibliography]
+        all_citations = list(chain(
+            citations,
+            ({**bib, "type": "bibliography"} for bib in bibliography)
+        ))
         
-        print(f"  ✓ Identified {len(citations)} citation points")
-        print(f"  ✓ Created bibliography with {len(bibliography)} entries")
+        logger.info("  ✓ Identified %s citation points", len(citations))
+        logger.info("  ✓ Created bibliography with %s entries", len(bibliography))
         
         return {"citations": all_citations}
     
     except Exception as e:
-        print(f"  ✗ Error in CitationAgent: {str(e)}")
+        logger.error("  ✗ Error in CitationAgent: %s", e)
         return {"citations": []}
-
@@ -1,9 +1,15 @@
 """EditorAgent - Final polish for coherence and academic tone."""
 
+import logging
 from typing import Dict, Any
 from src.state.state import EssayState
 from src.utils.ollama_client import OllamaClient
-from src.utils.prompts import EDITOR_AGENT_SYSTEM_PROMPT, get_editor_prompt
+from src.utils.prompts import EDITOR_AGENT_SYSTEM_PROMPT, get_editor_prompt, estimate_tokens
+
+logger = logging.getLogger("essay")
+
+# Tokens the editor may generate for the final essay
+EDITOR_MAX_TOKENS = 8000
 
 
 def editor_agent(state: EssayState, ollama_client: OllamaClient) -> Dict[str, Any]:
@@ -17,39 +23,49 @@ def editor_agent(state: EssayState, ollama_client: OllamaClient) -> Dict[str, An
     Returns:
         Updated state dictionary with final essay
     """
-    print("✨ EditorAgent: Final editing and formatting...")
+    logger.info("✨ EditorAgent: Final editing and formatting...")
     
     if not state.sections:
-        print("  Warning: No sections available for editing")
+        logger.warning("  Warning: No sections available for editing")
         return {"final_essay": ""}
     
     try:
-        # Calculate input word count from all sections
+        # Calculate input word count from all sections (once; reused for the prompt)
         input_word_count = sum(len(content.split()) for content in state.sections.values())
-        print(f"  📊 Input sections: {input_word_count} words across {len(state.sections)} sections")
+        logger.info("  📊 Input sections: %s words across %s sections", input_word_count, len(state.sections))
         
         # Generate prompt
-        prompt = get_editor_prompt(state.sections, state.citations, state.review_feedback)
+        prompt = get_editor_prompt(
+            state.sections,
+            state.citations,
+            state.review_feedback,
+            total_words=input_word_count
+        )
         
         # Generate final essay
         final_essay = ollama_client.generate(
             prompt=prompt,
             system=EDITOR_AGENT_SYSTEM_PROMPT,
             temperature=0.5,
-            max_tokens=8000
+            max_tokens=EDITOR_MAX_TOKENS,
+            # Only this call needs a window sized for the whole essay
+            options=ollama_client.context_options(
+                estimate_tokens(EDITOR_AGENT_SYSTEM_PROMPT, prompt) + EDITOR_MAX_TOKENS
+            )
         )
         
         # Add bibliography if citations exist
         if state.citations:
             bibliography = [c for c in state.citations if c.get("type") == "bibliography"]
             if bibliography:
-                final_essay += "\n\n## References\n\n"
-                for bib in bibliography:
-                    author = bib.get("author", "Unknown")
-                    year = bib.get("year", "n.d.")
-                    title = bib.get("title", "Untitled")
-                    publisher = bib.get("publisher", "")
-                    final_essay += f"{author} ({year}). {title}. {publisher}\n\n"
+                # Build the references block in one join instead of repeated +=
+                parts = ["\n\n## References\n\n"]
+                parts.extend(
+                    f"{bib.get('author', 'Unknown')} ({bib.get('year', 'n.d.')}). "
+                    f"{bib.get('title', 'Untitled')}. {bib.get('publisher', '')}\n\n"
+                    for bib in bibliography
+                )
+                final_essay += "".join(parts)
         
         # Calculate output word count
         output_word_count = len(final_essay.split())
@@ -57,22 +73,22 @@ def editor_agent(state: EssayState, ollama_client: OllamaClient) -> Dict[str, An
         # Validate content preservation
         compression_ratio = output_word_count / input_word_count if input_word_count > 0 else 0
         
-        print(f"  📊 Output essay: {output_word_count} words")
-        print(f"  📊 Content preservation: {compression_ratio:.1%} ({output_word_count}/{input_word_count} words)")
+        logger.info("  📊 Output essay: %s words", output_word_count)
+        logger.info("  📊 Content preservation: %.1f%% (%s/%s words)", compression_ratio * 100, output_word_count, input_word_count)
         
         if compression_ratio < 0.7:
-            print(f"  ⚠️  WARNING: Significant content compression detected! Output is only {compression_ratio:.1%} of input.")
-            print(f"  ⚠️  This suggests the model may have summarized/compressed content instead of preserving it.")
+            logger.warning("  ⚠️  WARNING: Significant content compression detected! Output is only %.1f%% of input.", compression_ratio * 100)
+            logger.warning("  ⚠️  This suggests the model may have summarized/compressed content instead of preserving it.")
         elif compression_ratio < 0.9:
-            print(f"  ⚠️  WARNING: Moderate content reduction detected ({compression_ratio:.1%}).")
+            logger.warning("  ⚠️  WARNING: Moderate content reduction detected (%.1f%%).", compression_ratio * 100)
         else:
-            print(f"  ✓ Content preservation: Good ({compression_ratio:.1%})")
+            logger.info("  ✓ Content preservation: Good (%.1f%%)", compression_ratio * 100)
         
-        print(f"  ✓ Formatted as Markdown")
+        logger.info("  ✓ Formatted as Markdown")
         
         return {"final_essay": final_essay}
     
     except Exception as e:
-        print(f"  ✗ Error in EditorAgent: {str(e)}")
+        logger.error("  ✗ Error in EditorAgent: %s", e)
         return {"final_essay": ""}
 
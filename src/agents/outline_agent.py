@@ -1,19 +1,60 @@
 """OutlineAgent - Creates structured essay outline."""
 
+import logging
 from typing import Dict, Any
 from src.state.state import EssayState
 from src.utils.ollama_client import OllamaClient
 from src.utils.prompts import (
-    OUTLINE_AGENT_SYSTEM_PROMPT,
+    INITIAL_OUTLINE_SYSTEM_PROMPT,
+    OUTLINE_REFINEMENT_SYSTEM_PROMPT,
     get_initial_outline_prompt,
     get_outline_refinement_prompt
 )
+from src.state.schemas import OUTLINE_JSON_SCHEMA
+
+logger = logging.getLogger("essay")
+
+
+def generate_initial_outline(state: EssayState, ollama_client: OllamaClient) -> Dict[str, Any]:
+    """
+    Generate the initial outline from topic and criteria only (step 1 of OutlineAgent).
+    
+    This step does not depend on research findings, so it can run concurrently
+    with ResearchAgent.
+    
+    Args:
+        state: Current essay state
+        ollama_client: Ollama client instance
+        
+    Returns:
+        Initial outline dictionary
+    """
+    logger.info("  Step 1: Generating initial outline structure...")
+    initial_prompt = get_initial_outline_prompt(
+        state.topic,
+        state.criteria,
+        target_length=state.target_length
+    )
+    
+    initial_outline = ollama_client.generate_structured(
+        prompt=initial_prompt,
+        system=INITIAL_OUTLINE_SYSTEM_PROMPT,
+        temperature=0.5,
+        schema=OUTLINE_JSON_SCHEMA
+    )
+    
+    num_sections = len(initial_outline.get("sections", []))
+    estimated_words = initial_outline.get("total_estimated_words", 0)
+    logger.info("  ✓ Initial outline: %s sections, ~%s words", num_sections, estimated_words)
+    
+    return initial_outline
 
 
 def outline_agent(state: EssayState, ollama_client: OllamaClient) -> Dict[str, Any]:
     """
     OutlineAgent creates a structured essay outline in two steps:
     1. First, generates an independent outline based on topic and criteria
+       (reused from state.initial_outline if it was generated alongside research)
     2. Then, refines it by incorporating research findings
     
     Args:
@@ -23,36 +64,25 @@ def outline_agent(state: EssayState, ollama_client: OllamaClient) -> Dict[str, A
     Returns:
         Updated state dictionary
     """
-    print("📋 OutlineAgent: Creating essay outline...")
+    logger.info("📋 OutlineAgent: Creating essay outline...")
     
     if not state.topic or not state.criteria:
-        print("  Warning: Missing topic or criteria")
+        logger.warning("  Warning: Missing topic or criteria")
         return {"outline": {}}
     
     target_length = state.target_length
     
     try:
         # Step 1: Generate initial outline independently (without research findings)
-        print("  Step 1: Generating initial outline structure...")
-        initial_prompt = get_initial_outline_prompt(
-            state.topic,
-            state.criteria,
-            target_length=target_length
-        )
-        
-        initial_outline = ollama_client.generate_structured(
-            prompt=initial_prompt,
-            system=OUTLINE_AGENT_SYSTEM_PROMPT,
-            temperature=0.5
-        )
-        
-        num_sections = len(initial_outline.get("sections", []))
-        estimated_words = initial_outline.get("total_estimated_words", 0)
-        print(f"  ✓ Initial outline: {num_sections} sections, ~{estimated_words} words")
+        if state.initial_outline:
+            initial_outline = state.initial_outline
+            logger.info("  Step 1: Using initial outline generated alongside research (%s sections)", len(initial_outline.get('sections', [])))
+        else:
+            initial_outline = generate_initial_outline(state, ollama_client)
         
         # Step 2: Refine outline by incorporating research findings
         if state.research_notes and any(state.research_notes.values()):
-            print("  Step 2: Refining outline with research findings...")
+            logger.info("  Step 2: Refining outline with research findings...")
             refinement_prompt = get_outline_refinement_prompt(
                 state.topic,
                 state.criteria,
@@ -63,27 +93,27 @@ def outline_agent(state: EssayState, ollama_client: OllamaClient) -> Dict[str, A
             
             refined_outline = ollama_client.generate_structured(
                 prompt=refinement_prompt,
-                system=OUTLINE_AGENT_SYSTEM_PROMPT,
-                temperature=0.5
+                system=OUTLINE_REFINEMENT_SYSTEM_PROMPT,
+                temperature=0.5,
+                schema=OUTLINE_JSON_SCHEMA
             )
             
             # Use refined outline if it's valid, otherwise fall back to initial
             if refined_outline and refined_outline.get("sections"):
                 outline = refined_outline
-                print(f"  ✓ Refined outline: {len(outline.get('sections', []))} sections")
+                logger.info("  ✓ Refined outline: %s sections", len(outline.get('sections', [])))
             else:
                 outline = initial_outline
-                print("  ⚠ Using initial outline (refinement produced invalid result)")
+                logger.warning("  ⚠ Using initial outline (refinement produced invalid result)")
         else:
             outline = initial_outline
-            print("  ⚠ No research notes available, using initial outline only")
+            logger.warning("  ⚠ No research notes available, using initial outline only")
         
         final_estimated_words = outline.get("total_estimated_words", 0)
-        print(f"  ✓ Final outline: {len(outline.get('sections', []))} sections, ~{final_estimated_words} words")
+        logger.info("  ✓ Final outline: %s sections, ~%s words", len(outline.get('sections', [])), final_estimated_words)
         
         return {"outline": outline}
     
     except Exception as e:
-        print(f"  ✗ Error in OutlineAgent: {str(e)}")
+        logger.error("  ✗ Error in OutlineAgent: %s", e)
         return {"outline": {}}
-
@@ -1,15 +1,63 @@
 """ResearchAgent - Analyzes literature and extracts key information."""
 
-from typing import Dict, Any
+import asyncio
+import logging
+from itertools import chain
+from typing import Dict, Any, List
 from src.state.state import EssayState
 from src.utils.ollama_client import OllamaClient
-from src.utils.prompts import RESEARCH_AGENT_SYSTEM_PROMPT, get_research_prompt
+from src.utils.prompts import RESEARCH_AGENT_SYSTEM_PROMPT, get_research_prompt_for_chunk
+from src.state.schemas import RESEARCH_NOTES_JSON_SCHEMA
 
+logger = logging.getLogger("essay")
 
-def research_agent(state: EssayState, ollama_client: OllamaClient) -> Dict[str, Any]:
+# Number of leading literature chunks analysed by the research step
+MAX_RESEARCH_CHUNKS = 10
+
+# List fields of the research notes that are merged across chunks
+RESEARCH_NOTE_FIELDS = ("arguments", "quotes", "themes", "methodologies", "findings", "gaps")
+
+
+def _dedupe_key(item: Any) -> Any:
+    """Key used to drop repeated notes; quotes are compared by normalised text."""
+    if isinstance(item, dict):
+        return " ".join(str(item.get("text", "")).lower().split())
+    if isinstance(item, str):
+        return " ".join(item.lower().split())
+    return repr(item)
+
+
+def _merge_notes(results: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    """
+    Merge per-chunk research notes, dropping duplicates across chunks.
+    
+    Args:
+        results: Research notes returned for each chunk, in chunk order
+        
+    Returns:
+        Merged research notes
+    """
+    research_notes: Dict[str, List[Any]] = {}
+    for field in RESEARCH_NOTE_FIELDS:
+        seen = set()
+        merged = []
+        for item in chain.from_iterable(notes.get(field) or [] for notes in results):
+            key = _dedupe_key(item)
+            if key in seen:
+                continue
+            seen.add(key)
+            merged.append(item)
+        research_notes[field] = merged
+    return research_notes
+
+
+async def research_agent(state: EssayState, ollama_client: OllamaClient) -> Dict[str, Any]:
     """
     ResearchAgent processes literature chunks and extracts key information.
     
+    Each chunk is analysed by its own LLM call; the calls run concurrently
+    (bounded by the client's max_parallel) and the notes are merged.
+    
     Args:
         state: Current essay state
         ollama_client: Ollama client instance
@@ -17,30 +65,45 @@ def research_agent(state: EssayState, ollama_client: OllamaClient) -> Dict[str,
     Returns:
         Updated state dictionary
     """
-    print("🔍 ResearchAgent: Analyzing literature...")
+    logger.info("🔍 ResearchAgent: Analyzing literature...")
     
     if not state.literature_chunks:
-        print("  Warning: No literature chunks available")
+        logger.warning("  Warning: No literature chunks available")
         return {"research_notes": {}}
     
     try:
-        # Generate prompt
-        prompt = get_research_prompt(state.topic, state.literature_chunks)
+        semaphore = asyncio.Semaphore(ollama_client.max_parallel)
         
-        # Get structured response
-        research_notes = ollama_client.generate_structured(
-            prompt=prompt,
-            system=RESEARCH_AGENT_SYSTEM_PROMPT,
-            temperature=0.3
-        )
+        async def analyse_chunk(chunk: str) -> Dict[str, Any]:
+            async with semaphore:
+                # Get structured response for this chunk
+                return await asyncio.to_thread(
+                    ollama_client.generate_structured,
+                    prompt=get_research_prompt_for_chunk(state.topic, chunk),
+                    system=RESEARCH_AGENT_SYSTEM_PROMPT,
+                    temperature=0.3,
+                    schema=RESEARCH_NOTES_JSON_SCHEMA
+                )
         
-        print(f"  ✓ Extracted {len(research_notes.get('arguments', []))} arguments")
-        print(f"  ✓ Found {len(research_notes.get('quotes', []))} quotes")
-        print(f"  ✓ Identified {len(research_notes.get('themes', []))} themes")
+        chunks = state.literature_chunks[:MAX_RESEARCH_CHUNKS]
+        results = await asyncio.gather(*(analyse_chunk(c) for c in chunks), return_exceptions=True)
+        
+        succeeded = [notes for notes in results if not isinstance(notes, Exception)]
+        failed = len(results) - len(succeeded)
+        if not succeeded:
+            raise results[0]
+        if failed:
+            logger.warning("  ⚠ %s/%s literature chunks could not be analysed", failed, len(results))
+        
+        # Merge per-chunk notes
+        research_notes = _merge_notes(succeeded)
+        
+        logger.info("  ✓ Extracted %s arguments", len(research_notes.get('arguments', [])))
+        logger.info("  ✓ Found %s quotes", len(research_notes.get('quotes', [])))
+        logger.info("  ✓ Identified %s themes", len(research_notes.get('themes', [])))
         
         return {"research_notes": research_notes}
     
     except Exception as e:
-        print(f"  ✗ Error in ResearchAgent: {str(e)}")
+        logger.error("  ✗ Error in ResearchAgent: %s", e)
         return {"research_notes": {}}
-
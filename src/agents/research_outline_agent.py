@@ -0,0 +1,125 @@
+"""Research + initial outline - Runs ResearchAgent and OutlineAgent step 1 concurrently."""
+
+import asyncio
+import logging
+from typing import Dict, Any
+from src.state.state import EssayState
+from src.utils.ollama_client import OllamaClient
+from src.agents.research_agent import research_agent, MAX_RESEARCH_CHUNKS, _merge_notes
+from src.agents.outline_agent import generate_initial_outline
+from src.utils.prompts import RESEARCH_OUTLINE_SYSTEM_PROMPT, get_research_and_outline_prompt, pack_chunks, estimate_tokens
+from src.state.schemas import RESEARCH_OUTLINE_JSON_SCHEMA
+
+logger = logging.getLogger("essay")
+
+# Tokens kept free in the combined call for the JSON reply (notes + outline)
+FUSED_RESPONSE_TOKENS = 3000
+
+
+def _fused_prompt(state: EssayState, ollama_client: OllamaClient) -> str:
+    """
+    Build the combined prompt with as many literature chunks as the context fits.
+    
+    The call keeps the configured num_ctx: a different window for one call
+    makes Ollama reload the model, which costs more than the round trip the
+    fusion saves. The literature budget is num_ctx less the estimated system
+    prompt, topic and criteria, and FUSED_RESPONSE_TOKENS for the reply.
+    Dropped chunks are logged, since the separate research calls would have
+    read them.
+    """
+    chunks = list(state.literature_chunks[:MAX_RESEARCH_CHUNKS])
+    base_prompt = get_research_and_outline_prompt(
+        state.topic, state.criteria, [], target_length=state.target_length
+    )
+    num_ctx = ollama_client.num_ctx
+    budget = num_ctx - estimate_tokens(RESEARCH_OUTLINE_SYSTEM_PROMPT, base_prompt) - FUSED_RESPONSE_TOKENS
+    
+    packed = pack_chunks(chunks, budget)
+    if len(packed) < len(chunks):
+        logger.warning(
+            "  ⚠ Context window (num_ctx=%s) fits %s of %s literature chunks; "
+            "raise ollama.options.num_ctx to include the rest",
+            num_ctx, len(packed), len(chunks)
+        )
+    return get_research_and_outline_prompt(
+        state.topic, state.criteria, packed, target_length=state.target_length
+    )
+
+
+async def research_and_initial_outline_agent(state: EssayState, ollama_client: OllamaClient) -> Dict[str, Any]:
+    """
+    Run literature research and the initial (research-independent) outline concurrently.
+    
+    The initial outline is stored in state so OutlineAgent only has to perform the
+    refinement step, hiding the research latency behind the initial outline call.
+    
+    Args:
+        state: Current essay state
+        ollama_client: Ollama client instance
+        
+    Returns:
+        Updated state dictionary with research notes and initial outline
+    """
+    async def initial_outline() -> Dict[str, Any]:
+        if not state.topic or not state.criteria:
+            return {}
+        try:
+            return await asyncio.to_thread(generate_initial_outline, state, ollama_client)
+        except Exception as e:
+            # OutlineAgent retries step 1 itself when no initial outline is available
+            logger.error("  ✗ Error generating initial outline: %s", e)
+            return {}
+    
+    research_updates, outline = await asyncio.gather(
+        research_agent(state, ollama_client),
+        initial_outline()
+    )
+    
+    return {**research_updates, "initial_outline": outline}
+
+
+async def fused_research_and_initial_outline_agent(state: EssayState, ollama_client: OllamaClient) -> Dict[str, Any]:
+    """
+    Extract research notes and draft the initial outline in a single LLM call.
+    
+    Saves a round trip (and re-processing the topic and criteria) when the server
+    runs requests one at a time. Falls back to separate calls if the combined
+    response is unusable.
+    
+    Args:
+        state: Current essay state
+        ollama_client: Ollama client instance
+        
+    Returns:
+        Updated state dictionary with research notes and initial outline
+    """
+    if not state.literature_chunks or not state.topic or not state.criteria:
+        return await research_and_initial_outline_agent(state, ollama_client)
+    
+    logger.info("🔍 ResearchAgent + OutlineAgent: Analyzing literature and drafting outline...")
+    
+    try:
+        result = await asyncio.to_thread(
+            ollama_client.generate_structured,
+            prompt=_fused_prompt(state, ollama_client),
+            system=RESEARCH_OUTLINE_SYSTEM_PROMPT,
+            temperature=0.3,
+            schema=RESEARCH_OUTLINE_JSON_SCHEMA
+        )
+    except Exception as e:
+        logger.error("  ✗ Error in combined research/outline call: %s", e)
+        return await research_and_initial_outline_agent(state, ollama_client)
+    
+    research_notes = result.get("research_notes") or {}
+    outline = result.get("initial_outline") or {}
+    if not research_notes or not outline.get("sections"):
+        logger.warning("  ⚠ Combined response incomplete, falling back to separate calls")
+        return await research_and_initial_outline_agent(state, ollama_client)
+    
+    research_notes = _merge_notes([research_notes])
+    logger.info("  ✓ Extracted %s arguments", len(research_notes.get('arguments', [])))
+    logger.info("  ✓ Found %s quotes", len(research_notes.get('quotes', [])))
+    logger.info("  ✓ Identified %s themes", len(research_notes.get('themes', [])))
+    logger.info("  ✓ Initial outline: %s sections, ~%s words", len(outline.get('sections', [])), outline.get('total_estimated_words', 0))
+    
+    return {"research_notes": research_notes, "initial_outline": outline}
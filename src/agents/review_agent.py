@@ -1,9 +1,20 @@
 """ReviewAgent - Evaluates draft against criteria and suggests improvements."""
 
+import hashlib
+import logging
+from collections import OrderedDict
 from typing import Dict, Any
 from src.state.state import EssayState
 from src.utils.ollama_client import OllamaClient
-from src.utils.prompts import REVIEW_AGENT_SYSTEM_PROMPT, get_review_prompt
+from src.utils.prompts import REVIEW_AGENT_SYSTEM_PROMPT, get_review_prompt, iter_sections
+from src.state.schemas import REVIEW_JSON_SCHEMA
+
+logger = logging.getLogger("essay")
+
+# Reviews of the last few drafts, keyed by a digest of the review prompt, so
+# a draft that a revision left unchanged is not sent for review again
+REVIEW_CACHE_SIZE = 8
+_reviews: "OrderedDict[bytes, Dict[str, Any]]" = OrderedDict()
 
 
 def review_agent(state: EssayState, ollama_client: OllamaClient) -> Dict[str, Any]:
@@ -17,34 +28,47 @@ def review_agent(state: EssayState, ollama_client: OllamaClient) -> Dict[str, An
     Returns:
         Updated state dictionary with review feedback and score
     """
-    print("🔎 ReviewAgent: Evaluating essay...")
+    logger.info("🔎 ReviewAgent: Evaluating essay...")
     
     if not state.sections:
-        print("  Warning: No sections available for review")
-        return {"review_feedback": [], "review_score": 0.0}
+        logger.warning("  Warning: No sections available for review")
+        return {"review_feedback": [], "review_score": 0.0, "weak_sections": []}
     
     try:
-        # Combine sections into essay content
-        essay_content = "\n\n".join([
-            f"## {name}\n\n{content}"
-            for name, content in state.sections.items()
-        ])
+        # Combine sections into essay content, copying each section text once
+        essay_content = "".join(iter_sections(state.sections, "\n\n"))
         
         # Generate prompt
         prompt = get_review_prompt(state.topic, state.criteria, essay_content)
         
-        # Get structured response
-        review_data = ollama_client.generate_structured(
-            prompt=prompt,
-            system=REVIEW_AGENT_SYSTEM_PROMPT,
-            temperature=0.4
-        )
+        # Get structured response, unless this exact draft was already reviewed
+        key = hashlib.blake2b(prompt.encode(), digest_size=16).digest()
+        review_data = _reviews.get(key)
+        if review_data is not None:
+            _reviews.move_to_end(key)
+            logger.info("  ⊘ Draft unchanged since an earlier review, reusing it")
+        else:
+            review_data = ollama_client.generate_structured(
+                prompt=prompt,
+                system=REVIEW_AGENT_SYSTEM_PROMPT,
+                temperature=0.4,
+                schema=REVIEW_JSON_SCHEMA
+            )
+            _reviews[key] = review_data
+            if len(_reviews) > REVIEW_CACHE_SIZE:
+                _reviews.popitem(last=False)
         
         score = review_data.get("score", 0.0)
         feedback = review_data.get("feedback", [])
         strengths = review_data.get("strengths", [])
         weaknesses = review_data.get("weaknesses", [])
         
+        # Keep only names of sections that actually exist
+        weak_sections = [
+            name for name in review_data.get("weak_sections", []) or []
+            if name in state.sections
+        ]
+        
         # Combine all feedback
         all_feedback = []
         if strengths:
@@ -57,15 +81,18 @@ def review_agent(state: EssayState, ollama_client: OllamaClient) -> Dict[str, An
             all_feedback.append("General Feedback:")
             all_feedback.extend([f"  - {f}" for f in feedback])
         
-        print(f"  ✓ Review score: {score:.2f}/1.0")
-        print(f"  ✓ Generated {len(all_feedback)} feedback points")
+        logger.info("  ✓ Review score: %.2f/1.0", score)
+        logger.info("  ✓ Generated %s feedback points", len(all_feedback))
+        if weak_sections:
+            logger.info("  ✓ Flagged for revision: %s", ', '.join(weak_sections))
         
         return {
             "review_feedback": all_feedback,
-            "review_score": score
+            "review_score": score,
+            "weak_sections": weak_sections
         }
     
     except Exception as e:
-        print(f"  ✗ Error in ReviewAgent: {str(e)}")
-        return {"review_feedback": [], "review_score": 0.0}
+        logger.error("  ✗ Error in ReviewAgent: %s", e)
+        return {"review_feedback": [], "review_score": 0.0, "weak_sections": []}
 
@@ -1,60 +1,316 @@
 """WriterAgent - Generates essay sections following academic conventions."""
 
-from typing import Dict, Any
+import asyncio
+import re
+import logging
+from typing import Dict, Any, List, Set, Tuple
 from src.state.state import EssayState
 from src.utils.ollama_client import OllamaClient
-from src.utils.prompts import WRITER_AGENT_SYSTEM_PROMPT, get_writer_prompt
+from src.utils.prompts import WRITER_AGENT_SYSTEM_PROMPT, get_writer_prompt, get_writer_batch_prompt
 
+logger = logging.getLogger("essay")
 
-def writer_agent(state: EssayState, ollama_client: OllamaClient) -> Dict[str, Any]:
+# Number of research quotes given to each section
+QUOTES_PER_SECTION = 5
+
+# Most words of section text requested in one batched call; longer
+# sections are always written with their own call
+BATCH_MAX_WORDS = 2000
+
+_TERM_RE = re.compile(r"[a-z0-9]{4,}")
+
+# Splits a batched response into [OUTPUT i] parts
+_OUTPUT_MARKER_RE = re.compile(r"\[OUTPUT (\d+)\]")
+
+
+def _terms(text: str) -> Set[str]:
+    """Lower-cased content words (4+ characters) used for relevance matching."""
+    return set(_TERM_RE.findall(text.lower()))
+
+
+def _notes_by_section(research_notes: Dict[str, Any], outline_sections: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
     """
-    WriterAgent generates essay sections one at a time following the outline.
+    Pick the research quotes most relevant to each section, once per writer pass.
+    
+    Quotes are ranked by word overlap with the section's name, subsections and
+    key points; ties keep the original order, and sections with no overlapping
+    quotes get the first quotes as before.
+    
+    Args:
+        research_notes: Merged research notes
+        outline_sections: Outline section dictionaries
+        
+    Returns:
+        Mapping of section name to research notes with only that section's quotes
+    """
+    quotes = research_notes.get("quotes", []) or []
+    quote_terms = [
+        _terms(f"{q.get('text', '')} {q.get('context', '')}") if isinstance(q, dict) else set()
+        for q in quotes
+    ]
+    
+    notes_by_section = {}
+    for section_info in outline_sections:
+        section_name = section_info.get("name", "Untitled Section")
+        section_terms = _terms(" ".join([
+            section_name,
+            *map(str, section_info.get("subsections", []) or []),
+            *map(str, section_info.get("key_points", []) or [])
+        ]))
+        scores = [len(section_terms & terms) for terms in quote_terms]
+        if any(scores):
+            ranked = sorted(range(len(quotes)), key=lambda i: -scores[i])[:QUOTES_PER_SECTION]
+            selected = [quotes[i] for i in sorted(ranked)]
+        else:
+            selected = quotes[:QUOTES_PER_SECTION]
+        notes_by_section[section_name] = {**research_notes, "quotes": selected}
+    
+    return notes_by_section
+
+
+def _estimated_words(section_info: Dict[str, Any]) -> int:
+    """The outline's word estimate for a section (0 if missing or malformed)."""
+    try:
+        return int(section_info.get("estimated_words", 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _batches(pending: List[Tuple[str, Dict[str, Any]]]) -> List[List[Tuple[str, Dict[str, Any]]]]:
+    """
+    Group sections into batches of at most BATCH_MAX_WORDS estimated words.
+    
+    Sections are packed in the given order; a section longer than the limit
+    gets a batch of its own.
+    """
+    batches: List[List[Tuple[str, Dict[str, Any]]]] = []
+    words = 0
+    for item in pending:
+        section_words = _estimated_words(item[1])
+        if not batches or words + section_words > BATCH_MAX_WORDS:
+            batches.append([])
+            words = 0
+        batches[-1].append(item)
+        words += section_words
+    return batches
+
+
+def _split_batch_output(response: str, count: int) -> Dict[int, str]:
+    """
+    Split a batched writer response into its [OUTPUT i] parts.
+    
+    Args:
+        response: Model response
+        count: Number of sections in the batch
+        
+    Returns:
+        Mapping of 1-based section index to text, for the non-empty parts found
+    """
+    parts = _OUTPUT_MARKER_RE.split(response)
+    outputs = {}
+    # parts is [preamble, index, text, index, text, ...]
+    for index, text in zip(parts[1::2], parts[2::2]):
+        text = text.strip()
+        if 1 <= int(index) <= count and text:
+            outputs[int(index)] = text
+    return outputs
+
+
+def _flagged_sections(state: EssayState, section_names: List[str]) -> Set[str]:
+    """
+    Find the sections the last review asked to revise.
+    
+    Uses the review's structured weak_sections when present, otherwise falls
+    back to matching section names in the feedback text.
     
     Args:
         state: Current essay state
-        ollama_client: Ollama client instance
+        section_names: Names of the sections in the outline
         
     Returns:
-        Updated state dictionary with new sections
+        Names of flagged sections (empty if none could be identified)
     """
-    print("✍️  WriterAgent: Generating essay sections...")
+    if state.weak_sections:
+        return set(state.weak_sections) & set(section_names)
+    
+    feedback = "\n".join(state.review_feedback).lower()
+    return {name for name in section_names if name.lower() in feedback}
+
+
+async def _write_sections(state: EssayState, ollama_client: OllamaClient, batch: bool) -> Dict[str, Any]:
+    """Write the outline's sections, one call per section or batched (see writer_agent)."""
+    logger.info("✍️  WriterAgent: Generating essay sections...")
     
     if not state.outline or "sections" not in state.outline:
-        print("  Warning: No outline available")
+        logger.warning("  Warning: No outline available")
         return {"sections": {}}
     
     sections = state.sections.copy() if state.sections else {}
     outline_sections = state.outline.get("sections", [])
+    semaphore = asyncio.Semaphore(ollama_client.max_parallel)
     
-    try:
-        for section_info in outline_sections:
-            section_name = section_info.get("name", "Untitled Section")
-            
-            # Skip if already written (unless we're revising)
-            if section_name in sections and state.revision_count == 0:
-                print(f"  ⊘ Skipping {section_name} (already written)")
-                continue
-            
-            print(f"  Writing: {section_name}...")
+    # Select each section's evidence once, rather than per prompt
+    notes_by_section = _notes_by_section(state.research_notes, outline_sections)
+    
+    async def write_section(section_name: str, section_info: Dict[str, Any]) -> str:
+        async with semaphore:
+            logger.info("  Writing: %s...", section_name)
             
             # Generate prompt for this section
-            prompt = get_writer_prompt(section_name, section_info, state.research_notes, state.topic)
+            prompt = get_writer_prompt(
+                section_name,
+                section_info,
+                notes_by_section.get(section_name, state.research_notes),
+                state.topic
+            )
             
             # Generate section content
-            section_content = ollama_client.generate(
+            section_content = await asyncio.to_thread(
+                ollama_client.generate,
                 prompt=prompt,
                 system=WRITER_AGENT_SYSTEM_PROMPT,
                 temperature=0.7,
                 max_tokens=4000
             )
             
-            sections[section_name] = section_content
-            print(f"    ✓ Completed {section_name} ({len(section_content)} characters)")
+            logger.info("    ✓ Completed %s (%s characters)", section_name, len(section_content))
+            return section_content
+    
+    async def write_batch(items: List[Tuple[str, Dict[str, Any]]]) -> List[Any]:
+        """Write several sections in one call; returns content (or an exception) per section."""
+        if len(items) == 1:
+            return await asyncio.gather(write_section(*items[0]), return_exceptions=True)
+        
+        async with semaphore:
+            logger.info("  Writing (batched): %s...", ", ".join(name for name, _ in items))
+            prompt = get_writer_batch_prompt(
+                [(name, info, notes_by_section.get(name, state.research_notes)) for name, info in items],
+                state.topic
+            )
+            try:
+                response = await asyncio.to_thread(
+                    ollama_client.generate,
+                    prompt=prompt,
+                    system=WRITER_AGENT_SYSTEM_PROMPT,
+                    temperature=0.7,
+                    max_tokens=4000
+                )
+            except Exception as e:
+                logger.error("  ✗ Error in batched call, writing sections separately: %s", e)
+                response = ""
+        
+        outputs = _split_batch_output(response, len(items))
+        
+        # Sections missing from the batched response are written on their own
+        missing = [i for i in range(1, len(items) + 1) if i not in outputs]
+        if missing:
+            logger.warning(
+                "  Batched response missed %s section(s), writing them separately",
+                len(missing)
+            )
+        retried = await asyncio.gather(
+            *(write_section(*items[i - 1]) for i in missing),
+            return_exceptions=True
+        )
+        outputs.update(zip(missing, retried))
+        
+        for i, (name, _) in enumerate(items, 1):
+            if i not in missing:
+                logger.info("    ✓ Completed %s (%s characters)", name, len(outputs[i]))
+        return [outputs[i] for i in range(1, len(items) + 1)]
+    
+    # On revision, only rewrite the sections the review flagged; if none can be
+    # identified, revise everything as before
+    sections_to_revise: Set[str] = set()
+    if state.revision_count > 0:
+        sections_to_revise = _flagged_sections(
+            state, [s.get("name", "Untitled Section") for s in outline_sections]
+        )
+    
+    try:
+        pending = []
+        for section_info in outline_sections:
+            section_name = section_info.get("name", "Untitled Section")
+            
+            # Skip if already written (unless we're revising)
+            if section_name in sections and state.revision_count == 0:
+                logger.info("  ⊘ Skipping %s (already written)", section_name)
+                continue
+            
+            # Skip sections the review didn't flag
+            if section_name in sections and sections_to_revise and section_name not in sections_to_revise:
+                logger.info("  ⊘ Keeping %s (not flagged for revision)", section_name)
+                continue
+            
+            pending.append((section_name, section_info))
+        
+        # Tasks acquire the semaphore in creation order, so this is the dispatch order
+        dispatch = sorted(pending, key=lambda item: -_estimated_words(item[1]))
+        if batch:
+            # Neighbouring sections share a call, in outline order; the
+            # largest batches are started first
+            batches = sorted(
+                _batches(pending),
+                key=lambda items: -sum(_estimated_words(info) for _, info in items)
+            )
+            batch_results = await asyncio.gather(*(write_batch(items) for items in batches))
+            results = [result for batch_result in batch_results for result in batch_result]
+            dispatch = [item for items in batches for item in items]
+        else:
+            results = await asyncio.gather(
+                *(write_section(section_name, section_info) for section_name, section_info in dispatch),
+                return_exceptions=True
+            )
+        written = {section_name: result for (section_name, _), result in zip(dispatch, results)}
+        
+        for section_name, _ in pending:
+            result = written[section_name]
+            if isinstance(result, Exception):
+                logger.error("  ✗ Error writing %s: %s", section_name, result)
+                continue
+            sections[section_name] = result
         
-        print(f"  ✓ Generated {len(sections)} sections total")
+        logger.info("  ✓ Generated %s sections total", len(sections))
         return {"sections": sections}
     
     except Exception as e:
-        print(f"  ✗ Error in WriterAgent: {str(e)}")
+        logger.error("  ✗ Error in WriterAgent: %s", e)
         return {"sections": sections}
 
+
+async def writer_agent(state: EssayState, ollama_client: OllamaClient) -> Dict[str, Any]:
+    """
+    WriterAgent generates essay sections following the outline.
+    
+    Sections are independent, so they are generated concurrently (bounded by the
+    client's max_parallel) and then stored in outline order. The longest
+    sections are started first, so short ones fill the remaining slots
+    instead of a long section starting last and holding up the whole pass.
+    
+    Args:
+        state: Current essay state
+        ollama_client: Ollama client instance
+        
+    Returns:
+        Updated state dictionary with new sections
+    """
+    return await _write_sections(state, ollama_client, batch=False)
+
+
+async def batched_writer_agent(state: EssayState, ollama_client: OllamaClient) -> Dict[str, Any]:
+    """
+    WriterAgent variant that writes several sections per LLM call.
+    
+    Sections are grouped into batches of up to BATCH_MAX_WORDS estimated words
+    and each batch is written by one call whose response is split on
+    [OUTPUT i] markers. Sections the response misses, and sections too long to
+    share a call, are written with their own call as in writer_agent.
+    
+    Args:
+        state: Current essay state
+        ollama_client: Ollama client instance
+        
+    Returns:
+        Updated state dictionary with new sections
+    """
+    return await _write_sections(state, ollama_client, batch=True)
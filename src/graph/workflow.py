@@ -1,13 +1,19 @@
 """LangGraph workflow definition for essay generation pipeline."""
 
+import asyncio
 import time
-from typing import Literal, Optional, TYPE_CHECKING, Callable, Dict, Any
+import inspect
+import logging
+from typing import Literal, Optional, TYPE_CHECKING, Callable, Dict, Any, Awaitable, Union
 from langgraph.graph import StateGraph, END
 from src.state.state import EssayState
 from src.utils.ollama_client import OllamaClient
-from src.agents.research_agent import research_agent
+from src.agents.research_outline_agent import (
+    research_and_initial_outline_agent,
+    fused_research_and_initial_outline_agent
+)
 from src.agents.outline_agent import outline_agent
-from src.agents.writer_agent import writer_agent
+from src.agents.writer_agent import writer_agent, batched_writer_agent
 from src.agents.citation_agent import citation_agent
 from src.agents.review_agent import review_agent
 from src.agents.editor_agent import editor_agent
@@ -15,12 +21,16 @@ from src.agents.editor_agent import editor_agent
 if TYPE_CHECKING:
     from src.utils.tracking.base_tracker import BaseTracker
 
+logger = logging.getLogger("essay")
+
 
 def create_workflow(
     ollama_client: OllamaClient,
     review_threshold: float = 0.7,
     max_revision_cycles: int = 2,
-    tracker: Optional["BaseTracker"] = None
+    tracker: Optional["BaseTracker"] = None,
+    fuse_research_outline: bool = False,
+    batch_sections: bool = False
 ):
     """
     Create LangGraph workflow for essay generation.
@@ -30,20 +40,48 @@ def create_workflow(
         review_threshold: Minimum review score to pass (0.0-1.0)
         max_revision_cycles: Maximum number of revision loops
         tracker: Optional tracker instance for observability
+        fuse_research_outline: Get research notes and the initial outline from one LLM call
+        batch_sections: Write several sections per LLM call
         
     Returns:
-        Compiled LangGraph workflow
+        Compiled LangGraph workflow (agent nodes are async; run with astream/ainvoke)
     """
     # Create state graph
     workflow = StateGraph(EssayState)
     
+    # Resolved once; the tracker's enabled state doesn't change during a run
+    tracking_enabled = bool(tracker and tracker.is_enabled() and hasattr(tracker, 'span_context'))
+    
+    async def _call_agent(
+        agent_func: Callable[[EssayState, OllamaClient], Union[Dict[str, Any], Awaitable[Dict[str, Any]]]],
+        state: EssayState
+    ) -> Dict[str, Any]:
+        """
+        Call a sync or async agent function and return its state updates.
+        
+        Sync agents run in a worker thread, so their blocking Ollama calls don't
+        hold up the event loop (or a Ctrl-C cancelling the run).
+        """
+        if inspect.iscoroutinefunction(agent_func):
+            return await agent_func(state, ollama_client)
+        return await asyncio.to_thread(agent_func, state, ollama_client)
+    
     def _wrap_agent(
         agent_name: str,
-        agent_func: Callable[[EssayState, OllamaClient], Dict[str, Any]]
-    ) -> Callable[[EssayState], EssayState]:
-        """Wrap an agent function with tracking using context managers."""
-        def tracked_node(state: EssayState) -> EssayState:
-            start_time = time.time()
+        agent_func: Callable[[EssayState, OllamaClient], Union[Dict[str, Any], Awaitable[Dict[str, Any]]]]
+    ) -> Callable[[EssayState], Awaitable[Dict[str, Any]]]:
+        """
+        Wrap an agent function with tracking using context managers.
+        
+        The wrapped node returns only the agent's updates; LangGraph merges them
+        into the state, so the (large) state is never copied between nodes.
+        """
+        async def tracked_node(state: EssayState) -> Dict[str, Any]:
+            # Fast path: without tracking, skip building any metadata
+            if not tracking_enabled:
+                return await _call_agent(agent_func, state)
+            
+            start_time = time.perf_counter()
             
             # Create input state summary
             input_metadata = {
@@ -56,79 +94,77 @@ def create_workflow(
                 "citations_count": len(state.citations) if state.citations else 0
             }
             
-            # Use context manager if available (simplified approach)
-            if tracker and tracker.is_enabled() and hasattr(tracker, 'span_context'):
-                try:
-                    with tracker.span_context(name=agent_name, metadata=input_metadata) as span:
-                        # Execute agent
-                        updates = agent_func(state, ollama_client)
-                        result_state = state.model_copy(update=updates)
-                        
-                        # Update span with output metadata
-                        if span:
-                            execution_time = time.time() - start_time
-                            output_metadata = {
-                                "execution_time_seconds": execution_time,
-                                "success": True
-                            }
-                            # Add output summary based on agent
-                            if agent_name == "research":
-                                research_notes = updates.get("research_notes", {})
-                                output_metadata["arguments_count"] = len(research_notes.get("arguments", []))
-                                output_metadata["quotes_count"] = len(research_notes.get("quotes", []))
-                                output_metadata["themes_count"] = len(research_notes.get("themes", []))
-                            elif agent_name == "outline":
-                                outline = updates.get("outline", {})
-                                output_metadata["sections_count"] = len(outline.get("sections", []))
-                            elif agent_name == "writer":
-                                sections = updates.get("sections", {})
-                                output_metadata["sections_generated"] = len(sections)
-                            elif agent_name == "citation":
-                                citations = updates.get("citations", [])
-                                output_metadata["citations_added"] = len(citations)
-                            elif agent_name == "review":
-                                output_metadata["review_score"] = updates.get("review_score", 0.0)
-                                output_metadata["feedback_count"] = len(updates.get("review_feedback", []))
-                            
-                            span.update(metadata=output_metadata)
-                        
-                        return result_state
-                except Exception as e:
-                    # Error is logged by span context manager
-                    raise
-            else:
-                # Fallback: execute without tracking
-                updates = agent_func(state, ollama_client)
-                return state.model_copy(update=updates)
+            # Errors are logged by the span context manager
+            with tracker.span_context(name=agent_name, metadata=input_metadata) as span:
+                # Execute agent
+                updates = await _call_agent(agent_func, state)
+                
+                # Update span with output metadata
+                if span:
+                    execution_time = time.perf_counter() - start_time
+                    output_metadata = {
+                        "execution_time_seconds": execution_time,
+                        "success": True
+                    }
+                    # Add output summary based on agent
+                    if agent_name == "research_and_initial_outline":
+                        research_notes = updates.get("research_notes", {})
+                        output_metadata["arguments_count"] = len(research_notes.get("arguments", []))
+                        output_metadata["quotes_count"] = len(research_notes.get("quotes", []))
+                        output_metadata["themes_count"] = len(research_notes.get("themes", []))
+                        output_metadata["initial_sections_count"] = len(updates.get("initial_outline", {}).get("sections", []))
+                    elif agent_name == "outline":
+                        outline = updates.get("outline", {})
+                        output_metadata["sections_count"] = len(outline.get("sections", []))
+                    elif agent_name == "writer":
+                        sections = updates.get("sections", {})
+                        output_metadata["sections_generated"] = len(sections)
+                    elif agent_name == "citation":
+                        citations = updates.get("citations", [])
+                        output_metadata["citations_added"] = len(citations)
+                    elif agent_name == "review":
+                        output_metadata["review_score"] = updates.get("review_score", 0.0)
+                        output_metadata["feedback_count"] = len(updates.get("review_feedback", []))
+                    
+                    span.update(metadata=output_metadata)
+                
+                return updates
         
         return tracked_node
     
     # Define node functions that wrap agents with tracking
-    def research_node(state: EssayState) -> EssayState:
-        return _wrap_agent("research", research_agent)(state)
+    research_outline_agent = (
+        fused_research_and_initial_outline_agent if fuse_research_outline
+        else research_and_initial_outline_agent
+    )
+    
+    section_writer_agent = batched_writer_agent if batch_sections else writer_agent
+    
+    async def research_and_initial_outline_node(state: EssayState) -> Dict[str, Any]:
+        return await _wrap_agent("research_and_initial_outline", research_outline_agent)(state)
     
-    def outline_node(state: EssayState) -> EssayState:
-        return _wrap_agent("outline", outline_agent)(state)
+    async def outline_node(state: EssayState) -> Dict[str, Any]:
+        return await _wrap_agent("outline", outline_agent)(state)
     
-    def writer_node(state: EssayState) -> EssayState:
-        return _wrap_agent("writer", writer_agent)(state)
+    async def writer_node(state: EssayState) -> Dict[str, Any]:
+        return await _wrap_agent("writer", section_writer_agent)(state)
     
-    def citation_node(state: EssayState) -> EssayState:
-        return _wrap_agent("citation", citation_agent)(state)
+    async def citation_node(state: EssayState) -> Dict[str, Any]:
+        return await _wrap_agent("citation", citation_agent)(state)
     
-    def review_node(state: EssayState) -> EssayState:
-        return _wrap_agent("review", review_agent)(state)
+    async def review_node(state: EssayState) -> Dict[str, Any]:
+        return await _wrap_agent("review", review_agent)(state)
     
-    def editor_node(state: EssayState) -> EssayState:
-        return _wrap_agent("editor", editor_agent)(state)
+    async def editor_node(state: EssayState) -> Dict[str, Any]:
+        return await _wrap_agent("editor", editor_agent)(state)
     
-    def increment_revision_node(state: EssayState) -> EssayState:
+    def increment_revision_node(state: EssayState) -> Dict[str, Any]:
         """Increment revision count when routing back to writer."""
-        print(f"🔄 Incrementing revision count: {state.revision_count + 1}")
-        return state.model_copy(update={"revision_count": state.revision_count + 1})
+        logger.info("🔄 Incrementing revision count: %s", state.revision_count + 1)
+        return {"revision_count": state.revision_count + 1}
     
     # Add nodes
-    workflow.add_node("research", research_node)
+    workflow.add_node("research_and_initial_outline", research_and_initial_outline_node)
     workflow.add_node("outline", outline_node)
     workflow.add_node("writer", writer_node)
     workflow.add_node("citation", citation_node)
@@ -149,10 +185,10 @@ def create_workflow(
             return "finalize"
     
     # Set entry point
-    workflow.set_entry_point("research")
+    workflow.set_entry_point("research_and_initial_outline")
     
     # Add linear edges
-    workflow.add_edge("research", "outline")
+    workflow.add_edge("research_and_initial_outline", "outline")
     workflow.add_edge("outline", "writer")
     workflow.add_edge("writer", "citation")
     workflow.add_edge("citation", "review")
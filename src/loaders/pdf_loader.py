@@ -1,41 +1,178 @@
 """PDF text extraction and chunking utilities."""
 
+import hashlib
+import json
+import multiprocessing
+import os
 import fitz  # PyMuPDF
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List
-import re
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from src.utils.cache import write_cache_file
 
 
-def extract_text_from_pdf(pdf_path: Path) -> str:
+# PDFs larger than this are opened by path instead of being read into memory
+MAX_IN_MEMORY_PDF_BYTES = 200 * 1024 * 1024
+
+# Upper bound on default worker processes; beyond this, disk I/O dominates
+MAX_DEFAULT_WORKERS = 8
+
+# PDFs with fewer pages are extracted in a single process
+PAGE_PARALLEL_MIN_PAGES = 32
+
+# PDFs up to this size are opened in memory before their pages are counted,
+# so a small file is read only once; larger ones are counted from disk
+PAGE_COUNT_IN_MEMORY_BYTES = 16 * 1024 * 1024
+
+# Worker processes are not forked: the caller runs other threads (log listener,
+# tracker flushes, HTTP requests), and forking a threaded process can deadlock
+_MP_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+
+def _open_pdf(pdf_path: Path) -> fitz.Document:
     """
-    Extract all text from a PDF file.
+    Open a PDF for extraction.
+    
+    Raises:
+        FileNotFoundError: If PDF file doesn't exist
+        Exception: For PDF parsing errors
+    """
+    if not pdf_path.exists():
+        raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+    
+    try:
+        # Read the whole file in one go; the parser then works on a memory
+        # buffer instead of issuing many small reads against the filesystem
+        if pdf_path.stat().st_size <= MAX_IN_MEMORY_PDF_BYTES:
+            return fitz.open(stream=pdf_path.read_bytes(), filetype="pdf")
+        return fitz.open(pdf_path)
+    except Exception as e:
+        raise Exception(f"Error extracting text from PDF {pdf_path}: {str(e)}")
+
+
+def iter_pdf_pages(pdf_path: Path, doc: Optional[fitz.Document] = None) -> Iterator[str]:
+    """
+    Lazily yield the text of each page of a PDF file.
+    
+    Pages are loaded one at a time, so only the current page is held in memory.
+    
+    Args:
+        pdf_path: Path to PDF file
+        doc: The PDF already opened (optional); it is closed when done
+        
+    Yields:
+        Extracted text of each page, in order
+        
+    Raises:
+        FileNotFoundError: If PDF file doesn't exist
+        Exception: For PDF parsing errors
+    """
+    if doc is None:
+        doc = _open_pdf(pdf_path)
+    
+    try:
+        for page_num in range(len(doc)):
+            try:
+                # Plain "text" mode is PyMuPDF's fastest extraction path
+                text = doc.load_page(page_num).get_text("text")
+            except Exception as e:
+                raise Exception(f"Error extracting text from PDF {pdf_path}: {str(e)}")
+            yield text
+    finally:
+        doc.close()
+
+
+def _extract_page_range(pdf_path: Path, start: int, stop: int) -> List[str]:
+    """
+    Extract the text of pages [start, stop) (top-level so it can run in a worker process).
     
     Args:
         pdf_path: Path to PDF file
+        start: First page index
+        stop: Page index to stop before
         
     Returns:
-        Extracted text as a single string
+        Extracted text of each page in the range, in order
+    """
+    with fitz.open(pdf_path) as doc:
+        return [doc.load_page(page_num).get_text("text") for page_num in range(start, stop)]
+
+
+def iter_pdf_pages_parallel(pdf_path: Path, workers: int) -> Iterator[str]:
+    """
+    Yield the text of each page of a PDF, extracting page ranges in parallel.
+    
+    Each worker process reopens the file and extracts a contiguous slice of
+    pages; slices are yielded in page order. Small PDFs (or workers <= 1) use
+    the lazy single-process path.
+    
+    Args:
+        pdf_path: Path to PDF file
+        workers: Number of worker processes
+        
+    Yields:
+        Extracted text of each page, in order
         
     Raises:
         FileNotFoundError: If PDF file doesn't exist
         Exception: For PDF parsing errors
     """
+    if workers <= 1:
+        yield from iter_pdf_pages(pdf_path)
+        return
+    
     if not pdf_path.exists():
         raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+    if pdf_path.stat().st_size <= PAGE_COUNT_IN_MEMORY_BYTES:
+        # Small file: the document opened to count pages is the one extracted
+        doc = _open_pdf(pdf_path)
+        page_count = len(doc)
+        if page_count < PAGE_PARALLEL_MIN_PAGES:
+            yield from iter_pdf_pages(pdf_path, doc)
+            return
+        doc.close()
+    else:
+        # Opening by path is lazy, so counting pages doesn't read the whole file
+        try:
+            with fitz.open(pdf_path) as doc:
+                page_count = len(doc)
+        except Exception as e:
+            raise Exception(f"Error extracting text from PDF {pdf_path}: {str(e)}")
+        if page_count < PAGE_PARALLEL_MIN_PAGES:
+            yield from iter_pdf_pages(pdf_path)
+            return
     
-    try:
-        doc = fitz.open(pdf_path)
-        text_parts = []
+    workers = min(workers, page_count)
+    shard_size = -(-page_count // workers)  # ceiling division
+    bounds = [(start, min(start + shard_size, page_count)) for start in range(0, page_count, shard_size)]
+    
+    with ProcessPoolExecutor(max_workers=workers, mp_context=_MP_CONTEXT) as executor:
+        futures = [executor.submit(_extract_page_range, pdf_path, start, stop) for start, stop in bounds]
+        for future in futures:
+            try:
+                pages = future.result()
+            except Exception as e:
+                raise Exception(f"Error extracting text from PDF {pdf_path}: {str(e)}")
+            yield from pages
+
+
+def extract_text_from_pdf(pdf_path: Path) -> str:
+    """
+    Extract all text from a PDF file.
+    
+    Args:
+        pdf_path: Path to PDF file
         
-        for page_num in range(len(doc)):
-            page = doc[page_num]
-            text = page.get_text()
-            text_parts.append(text)
+    Returns:
+        Extracted text as a single string
         
-        doc.close()
-        return "\n\n".join(text_parts)
-    except Exception as e:
-        raise Exception(f"Error extracting text from PDF {pdf_path}: {str(e)}")
+    Raises:
+        FileNotFoundError: If PDF file doesn't exist
+        Exception: For PDF parsing errors
+    """
+    return "\n\n".join(iter_pdf_pages(pdf_path))
 
 
 def estimate_tokens(text: str) -> int:
@@ -51,6 +188,90 @@ def estimate_tokens(text: str) -> int:
     return len(text) // 4
 
 
+def iter_chunks(
+    pages: Iterable[str],
+    chunk_size: int = 1000,
+    chunk_overlap: int = 100
+) -> Iterator[str]:
+    """
+    Split a stream of text pieces (e.g. PDF pages) into chunks with overlap.
+    
+    Produces the same chunks as chunking the whitespace-normalised concatenation
+    of all pieces, but only buffers about one chunk of text at a time, so chunks
+    are yielded before the last page has been read.
+    
+    Args:
+        pages: Iterable of text pieces, in order
+        chunk_size: Target chunk size in tokens
+        chunk_overlap: Overlap size in tokens
+        
+    Yields:
+        Text chunks
+    """
+    # Estimate characters per token (approximately 4)
+    chars_per_token = 4
+    chunk_char_size = chunk_size * chars_per_token
+    overlap_char_size = chunk_overlap * chars_per_token
+    
+    # Loop invariants for the sentence-boundary search
+    search_window = int(chunk_char_size * 0.2)  # last 20% of a chunk
+    min_break = chunk_char_size * 0.5  # don't break before half a chunk
+    
+    pages = iter(pages)
+    exhausted = False
+    
+    # Cleaned text buffer; the current chunk starts at offset pos. Chunks are
+    # located with offsets into the buffer, so the unconsumed text is never
+    # re-copied per chunk (only when the buffer is refilled).
+    text = ""
+    pos = 0
+    
+    while True:
+        # Buffer more than one chunk so we know whether this is the last chunk
+        while not exhausted and len(text) - pos <= chunk_char_size:
+            page = next(pages, None)
+            if page is None:
+                exhausted = True
+                break
+            # Clean text
+            words = page.split()
+            if words:
+                cleaned = " ".join(words)
+                # Drop the consumed prefix before growing the buffer
+                if pos:
+                    text = text[pos:]
+                    pos = 0
+                text = f"{text} {cleaned}" if text else cleaned
+        
+        text_length = len(text) - pos
+        if not text_length:
+            return
+        
+        # Calculate end position (relative to pos)
+        end_pos = min(chunk_char_size, text_length)
+        
+        # Try to break at sentence boundary if not at end
+        if end_pos < text_length:
+            # Look for sentence endings within last 20% of chunk. Cleaning
+            # collapses all whitespace to single spaces, so the buffer holds no
+            # newlines and a period is the only boundary to search for.
+            search_start = max(0, end_pos - search_window)
+            break_point = text.rfind('.', pos + search_start, pos + end_pos)
+            if break_point != -1 and break_point - pos > min_break:  # Only if reasonable
+                end_pos = break_point - pos + 1
+        
+        yield text[pos:pos + end_pos].strip()
+        
+        # Move position forward with overlap
+        if end_pos >= text_length:
+            return
+        next_pos = end_pos - overlap_char_size
+        if next_pos < 0:
+            # Overlap larger than the chunk: keep the last -next_pos characters
+            next_pos = max(0, text_length + next_pos)
+        pos += next_pos
+
+
 def chunk_text(
     text: str,
     chunk_size: int = 1000,
@@ -72,62 +293,133 @@ def chunk_text(
     if token_estimator is None:
         token_estimator = estimate_tokens
     
-    # Clean text
-    text = re.sub(r'\s+', ' ', text).strip()
+    return list(iter_chunks([text], chunk_size, chunk_overlap))
+
+
+def iter_literature_chunks(pdf_path: Path, chunk_size: int = 1000, chunk_overlap: int = 100) -> Iterator[str]:
+    """
+    Lazily yield chunks from a PDF, reading pages on demand.
     
-    if not text:
-        return []
+    Args:
+        pdf_path: Path to PDF file
+        chunk_size: Target chunk size in tokens
+        chunk_overlap: Overlap size in tokens
+        
+    Yields:
+        Text chunks from the PDF
+    """
+    return iter_chunks(iter_pdf_pages(pdf_path), chunk_size, chunk_overlap)
+
+
+def _process_pdf(pdf_path: Path, chunk_size: int, chunk_overlap: int) -> List[str]:
+    """
+    Extract and chunk a single PDF (top-level so it can run in a worker process).
     
-    chunks = []
-    current_pos = 0
-    text_length = len(text)
+    Args:
+        pdf_path: Path to PDF file
+        chunk_size: Target chunk size in tokens
+        chunk_overlap: Overlap size in tokens
+        
+    Returns:
+        List of text chunks from the PDF
+    """
+    return list(iter_literature_chunks(pdf_path, chunk_size, chunk_overlap))
+
+
+def _file_digest(pdf_path: Path) -> str:
+    """Hash a file's contents (identifies a PDF regardless of its name)."""
+    with open(pdf_path, "rb") as f:
+        return hashlib.file_digest(f, lambda: hashlib.blake2b(digest_size=16)).hexdigest()
+
+
+def _read_cached_chunks(cache_file: Path) -> Optional[List[str]]:
+    """Return chunks stored by a previous run, or None on a miss."""
+    try:
+        with open(cache_file, "r", encoding="utf-8") as f:
+            return json.load(f)["chunks"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _write_cached_chunks(cache_file: Path, chunks: List[str]) -> None:
+    """Store a file's chunks (best-effort, see write_cache_file)."""
+    write_cache_file(cache_file, json.dumps({"chunks": chunks}, ensure_ascii=False).encode("utf-8"))
+
+
+def _extract_chunks(
+    pdf_files: List[Path],
+    chunk_size: int,
+    chunk_overlap: int,
+    workers: int
+) -> Iterator[Tuple[Path, Optional[List[str]]]]:
+    """
+    Extract and chunk PDFs, yielding (path, chunks) in file order.
     
-    # Estimate characters per token (approximately 4)
-    chars_per_token = 4
-    chunk_char_size = chunk_size * chars_per_token
-    overlap_char_size = chunk_overlap * chars_per_token
+    Chunks are None for a file that could not be processed.
+    """
+    page_workers = workers
+    workers = min(workers, len(pdf_files))
     
-    while current_pos < text_length:
-        # Calculate end position
-        end_pos = min(current_pos + chunk_char_size, text_length)
-        
-        # Extract chunk
-        chunk = text[current_pos:end_pos]
-        
-        # Try to break at sentence boundary if not at end
-        if end_pos < text_length:
-            # Look for sentence endings within last 20% of chunk
-            search_start = max(current_pos, end_pos - int(chunk_char_size * 0.2))
-            last_period = chunk.rfind('.', search_start - current_pos)
-            last_newline = chunk.rfind('\n', search_start - current_pos)
-            
-            # Prefer period, then newline
-            break_point = max(last_period, last_newline)
-            if break_point > chunk_char_size * 0.5:  # Only if reasonable
-                chunk = chunk[:break_point + 1]
-                end_pos = current_pos + break_point + 1
-        
-        chunks.append(chunk.strip())
-        
-        # Move position forward with overlap
-        if end_pos >= text_length:
-            break
-        current_pos = end_pos - overlap_char_size
+    if workers <= 1 or len(pdf_files) <= 2:
+        # Too few files to spread across processes; split large files by page instead
+        for pdf_path in pdf_files:
+            try:
+                print(f"Loading PDF: {pdf_path.name}")
+                chunks = list(iter_chunks(
+                    iter_pdf_pages_parallel(pdf_path, page_workers),
+                    chunk_size,
+                    chunk_overlap
+                ))
+            except Exception as e:
+                print(f"  Error processing {pdf_path.name}: {str(e)}")
+                chunks = None
+            yield pdf_path, chunks
+        return
     
-    return chunks
+    print(f"Loading {len(pdf_files)} PDFs with {workers} workers...")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=_MP_CONTEXT) as executor:
+        futures = [
+            executor.submit(_process_pdf, pdf_path, chunk_size, chunk_overlap)
+            for pdf_path in pdf_files
+        ]
+        # Yield in submission order so chunk order matches the serial path
+        for pdf_path, future in zip(pdf_files, futures):
+            try:
+                chunks = future.result()
+            except Exception as e:
+                print(f"  Error processing {pdf_path.name}: {str(e)}")
+                chunks = None
+            yield pdf_path, chunks
 
 
-def load_pdfs_from_directory(directory: Path, chunk_size: int = 1000, chunk_overlap: int = 100) -> List[str]:
+def iter_pdf_chunks(
+    directory: Path,
+    chunk_size: int = 1000,
+    chunk_overlap: int = 100,
+    workers: Optional[int] = None,
+    cache_dir: Optional[Path] = None
+) -> Iterator[str]:
     """
-    Load all PDFs from a directory and return chunked text.
+    Yield chunked text from all PDFs in a directory, one file at a time.
+    
+    PDFs are extracted in parallel across worker processes. Directories with
+    only one or two PDFs are processed file by file instead, splitting large
+    files' pages across the workers. Only one file's chunks are held at a time
+    (a file that fails part-way contributes no chunks).
+    
+    Files are identified by a checksum of their contents: copies of the same
+    PDF are only loaded once, and with a cache_dir, the chunks of unchanged
+    files are reused across runs instead of being extracted again.
     
     Args:
         directory: Directory containing PDF files
         chunk_size: Target chunk size in tokens
         chunk_overlap: Overlap size in tokens
+        workers: Number of worker processes (default: CPU count, at most MAX_DEFAULT_WORKERS)
+        cache_dir: Directory for cached chunks (optional; no caching if None)
         
-    Returns:
-        List of text chunks from all PDFs
+    Yields:
+        Text chunks from all PDFs, in file order
         
     Raises:
         FileNotFoundError: If directory doesn't exist
@@ -138,23 +430,87 @@ def load_pdfs_from_directory(directory: Path, chunk_size: int = 1000, chunk_over
     if not directory.is_dir():
         raise ValueError(f"Path is not a directory: {directory}")
     
-    all_chunks = []
     pdf_files = list(directory.glob("*.pdf"))
     
     if not pdf_files:
         print(f"Warning: No PDF files found in {directory}")
-        return []
+        return
     
+    # Skip copies of a PDF already in the directory (under another name)
+    digests: Dict[Path, str] = {}
+    seen: Dict[str, Path] = {}
     for pdf_path in pdf_files:
         try:
-            print(f"Loading PDF: {pdf_path.name}")
-            text = extract_text_from_pdf(pdf_path)
-            chunks = chunk_text(text, chunk_size, chunk_overlap)
-            all_chunks.extend(chunks)
-            print(f"  Extracted {len(chunks)} chunks from {pdf_path.name}")
-        except Exception as e:
-            print(f"  Error processing {pdf_path.name}: {str(e)}")
+            digest = _file_digest(pdf_path)
+        except OSError:
+            # Unreadable files are reported by extraction as before
+            digests[pdf_path] = ""
+            continue
+        if digest in seen:
+            print(f"Skipping {pdf_path.name} (same content as {seen[digest].name})")
             continue
+        seen[digest] = pdf_path
+        digests[pdf_path] = digest
+    pdf_files = list(digests)
+    
+    cache_files: Dict[Path, Path] = {}
+    cached: Dict[Path, List[str]] = {}
+    if cache_dir is not None:
+        for pdf_path, digest in digests.items():
+            if not digest:
+                continue
+            cache_files[pdf_path] = cache_dir / f"{digest}-{chunk_size}-{chunk_overlap}.json"
+            chunks = _read_cached_chunks(cache_files[pdf_path])
+            if chunks is not None:
+                cached[pdf_path] = chunks
     
-    return all_chunks
+    if workers is None:
+        workers = min(os.cpu_count() or 1, MAX_DEFAULT_WORKERS)
+    
+    # Both walk the files in the same order, so extraction results line up
+    extracted = _extract_chunks(
+        [pdf_path for pdf_path in pdf_files if pdf_path not in cached],
+        chunk_size,
+        chunk_overlap,
+        workers
+    )
+    for pdf_path in pdf_files:
+        if pdf_path in cached:
+            chunks = cached.pop(pdf_path)
+            print(f"  Reused {len(chunks)} cached chunks for {pdf_path.name}")
+            yield from chunks
+            continue
+        
+        _, chunks = next(extracted)
+        if chunks is None:
+            continue
+        if pdf_path in cache_files:
+            _write_cached_chunks(cache_files[pdf_path], chunks)
+        print(f"  Extracted {len(chunks)} chunks from {pdf_path.name}")
+        yield from chunks
 
+
+def load_pdfs_from_directory(
+    directory: Path,
+    chunk_size: int = 1000,
+    chunk_overlap: int = 100,
+    workers: Optional[int] = None,
+    cache_dir: Optional[Path] = None
+) -> List[str]:
+    """
+    Load all PDFs from a directory and return chunked text.
+    
+    Args:
+        directory: Directory containing PDF files
+        chunk_size: Target chunk size in tokens
+        chunk_overlap: Overlap size in tokens
+        workers: Number of worker processes (default: CPU count, at most MAX_DEFAULT_WORKERS)
+        cache_dir: Directory for cached chunks (optional; no caching if None)
+        
+    Returns:
+        List of text chunks from all PDFs
+        
+    Raises:
+        FileNotFoundError: If directory doesn't exist
+    """
+    return list(iter_pdf_chunks(directory, chunk_size, chunk_overlap, workers, cache_dir))
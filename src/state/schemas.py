@@ -0,0 +1,120 @@
+"""Pydantic schemas for the structured (JSON) responses of each agent."""
+
+from typing import Any, Dict, List, Type
+from pydantic import BaseModel
+
+
+class QuoteSchema(BaseModel):
+    """A quote extracted from the literature."""
+    
+    text: str
+    context: str
+    source: str
+
+
+class ResearchNotesSchema(BaseModel):
+    """ResearchAgent response."""
+    
+    arguments: List[str]
+    quotes: List[QuoteSchema]
+    themes: List[str]
+    methodologies: List[str]
+    findings: List[str]
+    gaps: List[str]
+
+
+class OutlineSectionSchema(BaseModel):
+    """A single section of the essay outline."""
+    
+    name: str
+    subsections: List[str]
+    estimated_words: int
+    key_points: List[str]
+
+
+class OutlineSchema(BaseModel):
+    """OutlineAgent response (initial and refined outline)."""
+    
+    title: str
+    sections: List[OutlineSectionSchema]
+    total_estimated_words: int
+
+
+class ResearchOutlineSchema(BaseModel):
+    """Combined research notes + initial outline response."""
+    
+    research_notes: ResearchNotesSchema
+    initial_outline: OutlineSchema
+
+
+class CitationSchema(BaseModel):
+    """An in-text citation."""
+    
+    text: str
+    source: str
+    author: str
+    year: str
+    page: str
+
+
+class BibliographyEntrySchema(BaseModel):
+    """A bibliography entry."""
+    
+    author: str
+    year: str
+    title: str
+    publisher: str
+
+
+class CitationResponseSchema(BaseModel):
+    """CitationAgent response."""
+    
+    citations: List[CitationSchema]
+    bibliography: List[BibliographyEntrySchema]
+
+
+class ReviewSchema(BaseModel):
+    """ReviewAgent response."""
+    
+    score: float
+    feedback: List[str]
+    strengths: List[str]
+    weaknesses: List[str]
+    weak_sections: List[str]
+    meets_criteria: bool
+
+
+def _inline_refs(node: Any, defs: Dict[str, Any]) -> Any:
+    """Replace local $ref pointers with the referenced definitions."""
+    if isinstance(node, dict):
+        ref = node.get("$ref")
+        if ref and ref.startswith("#/$defs/"):
+            return _inline_refs(defs[ref[len("#/$defs/"):]], defs)
+        return {key: _inline_refs(value, defs) for key, value in node.items() if key != "$defs"}
+    if isinstance(node, list):
+        return [_inline_refs(item, defs) for item in node]
+    return node
+
+
+def json_schema(model: Type[BaseModel]) -> Dict[str, Any]:
+    """
+    Build a self-contained JSON Schema for a response model.
+    
+    Nested models are inlined, since not every Ollama version resolves $ref.
+    
+    Args:
+        model: Pydantic response model
+    
+    Returns:
+        JSON Schema dictionary suitable for Ollama's format parameter
+    """
+    schema = model.model_json_schema()
+    return _inline_refs(schema, schema.get("$defs", {}))
+
+
+# Precomputed once; passed to OllamaClient.generate_structured(schema=...)
+RESEARCH_NOTES_JSON_SCHEMA = json_schema(ResearchNotesSchema)
+OUTLINE_JSON_SCHEMA = json_schema(OutlineSchema)
+RESEARCH_OUTLINE_JSON_SCHEMA = json_schema(ResearchOutlineSchema)
+CITATION_JSON_SCHEMA = json_schema(CitationResponseSchema)
+REVIEW_JSON_SCHEMA = json_schema(ReviewSchema)
@@ -1,7 +1,7 @@
 """Pydantic state model for essay generation workflow."""
 
-from typing import Dict, List, Any, Optional
-from pydantic import BaseModel, Field
+from typing import Dict, List, Any, Optional, Tuple
+from pydantic import BaseModel, Field, field_validator
 
 
 class EssayState(BaseModel):
@@ -10,16 +10,24 @@ class EssayState(BaseModel):
     topic: str = Field(default="", description="Essay topic")
     criteria: str = Field(default="", description="Evaluation criteria")
     target_length: int = Field(default=5000, description="Target word count for the essay")
-    literature_chunks: List[str] = Field(default_factory=list, description="Chunked text from literature PDFs")
+    literature_chunks: Tuple[str, ...] = Field(default_factory=tuple, repr=False, description="Chunked text from literature PDFs (read-only after loading)")
     research_notes: Dict[str, Any] = Field(default_factory=dict, description="Structured research notes with arguments, quotes, themes")
+    initial_outline: Dict[str, Any] = Field(default_factory=dict, description="Outline drafted from topic and criteria only, before research refinement")
     outline: Dict[str, Any] = Field(default_factory=dict, description="Structured essay outline")
     sections: Dict[str, str] = Field(default_factory=dict, description="Generated essay sections (section_name -> content)")
     citations: List[Dict[str, Any]] = Field(default_factory=list, description="APA-formatted citations")
     review_feedback: List[str] = Field(default_factory=list, description="Review feedback and suggestions")
+    weak_sections: List[str] = Field(default_factory=list, description="Sections the last review flagged for revision")
     final_essay: str = Field(default="", description="Final polished essay in Markdown format")
     revision_count: int = Field(default=0, description="Number of revision cycles completed")
     review_score: float = Field(default=0.0, description="Review score (0.0-1.0)")
     
+    @field_validator("literature_chunks", mode="plain")
+    @classmethod
+    def _literature_chunks_as_tuple(cls, value: Any) -> Tuple[str, ...]:
+        """Accept the (trusted) chunks as-is instead of validating every string."""
+        return value if isinstance(value, tuple) else tuple(value)
+    
     class Config:
         """Pydantic configuration."""
         arbitrary_types_allowed = True
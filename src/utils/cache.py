@@ -0,0 +1,27 @@
+"""Helpers for the on-disk caches (config, LLM responses, PDF chunks)."""
+
+import os
+import threading
+from pathlib import Path
+
+
+def write_cache_file(cache_file: Path, data: bytes) -> None:
+    """
+    Atomically write a cache entry, creating its directory if needed.
+    
+    The data goes to a temporary file (unique per process and thread) that is
+    then renamed over cache_file, so readers never see a partial entry. Caches
+    are best-effort: write errors are ignored rather than breaking the run.
+    
+    Args:
+        cache_file: Path of the cache entry
+        data: Serialized entry
+    """
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_file, "wb") as f:
+            f.write(data)
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        pass
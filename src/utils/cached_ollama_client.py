@@ -0,0 +1,125 @@
+"""Ollama client with an exact-match on-disk response cache."""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, Optional, Union, TYPE_CHECKING
+from src.utils.ollama_client import OllamaClient
+from src.utils.cache import write_cache_file
+
+if TYPE_CHECKING:
+    from src.utils.tracking.base_tracker import BaseTracker
+
+
+class CachedOllamaClient(OllamaClient):
+    """OllamaClient that reuses responses for identical requests, across runs."""
+    
+    def __init__(
+        self,
+        model: str,
+        base_url: str = "http://localhost:11434",
+        timeout: int = 900,
+        tracker: Optional["BaseTracker"] = None,
+        max_parallel: int = 1,
+        options: Optional[Dict[str, Any]] = None,
+        cache_dir: Optional[Path] = None
+    ):
+        """
+        Initialize cached Ollama client.
+        
+        Args:
+            model: Model name (e.g., "llama3.1:8b-instruct-q4_K_M")
+            base_url: Ollama API base URL
+            timeout: Request timeout in seconds
+            tracker: Optional tracker instance for observability
+            max_parallel: Maximum concurrent requests agents may issue
+            options: Extra Ollama model options sent with every request
+            cache_dir: Directory for cached responses (default: ~/.cache/essaygen/llm)
+        """
+        super().__init__(
+            model=model,
+            base_url=base_url,
+            timeout=timeout,
+            tracker=tracker,
+            max_parallel=max_parallel,
+            options=options
+        )
+        self.cache_dir = cache_dir or Path.home() / ".cache" / "essaygen" / "llm"
+    
+    def _cache_key(
+        self,
+        prompt: str,
+        system: Optional[str],
+        temperature: float,
+        max_tokens: Optional[int],
+        format: Optional[Union[str, Dict[str, Any]]] = None,
+        options: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """Hash everything that determines the response."""
+        payload = json.dumps(
+            {
+                "model": self.model,
+                "system": system,
+                "prompt": prompt,
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+                "options": {**self.options, **(options or {})},
+                "format": format,
+            },
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.blake2b(payload.encode("utf-8"), digest_size=20).hexdigest()
+    
+    def generate(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        format: Optional[Union[str, Dict[str, Any]]] = None,
+        options: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """
+        Generate text, returning a cached response if the same request was made before.
+        
+        Args:
+            prompt: User prompt
+            system: System prompt (optional)
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate
+            format: Output constraint: "json" or a JSON Schema (optional)
+            options: Ollama options for this call only, overriding the client's (optional)
+            
+        Returns:
+            Generated (or cached) text
+        """
+        cache_file = self.cache_dir / f"{self._cache_key(prompt, system, temperature, max_tokens, format, options)}.json"
+        
+        response_text = self._read_cache(cache_file)
+        if response_text is not None:
+            return response_text
+        
+        response_text = super().generate(
+            prompt=prompt,
+            system=system,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            format=format,
+            options=options
+        )
+        self._write_cache(cache_file, response_text)
+        return response_text
+    
+    def _read_cache(self, cache_file: Path) -> Optional[str]:
+        """Return the cached response, or None on a miss."""
+        try:
+            with open(cache_file, "r", encoding="utf-8") as f:
+                response_text = json.load(f)["response"]
+        except (OSError, ValueError, KeyError):
+            return None
+        return response_text
+    
+    def _write_cache(self, cache_file: Path, response_text: str) -> None:
+        """Store a response (best-effort, see write_cache_file)."""
+        write_cache_file(cache_file, json.dumps({"response": response_text}, ensure_ascii=False).encode("utf-8"))
@@ -1,61 +1,125 @@
 """Utility functions for saving intermediate essay checkpoints."""
 
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import BinaryIO, Dict, Any, Optional, Tuple
 from src.state.state import EssayState
 import json
+import os
+import threading
+import uuid
 from datetime import datetime
 
+# Prefer orjson for reading and writing checkpoints when installed; both
+# produce the same UTF-8 JSON (compact, or 2-space indented when pretty), so
+# checkpoints load identically either way
+try:
+    import orjson
+    
+    def _dumps(obj: Any, pretty: bool = False) -> bytes:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+        return orjson.dumps(obj, option=option)
+    
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj: Any, pretty: bool = False) -> bytes:
+        if pretty:
+            return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    
+    _loads = json.loads
+
+# Literature chunks never change after loading, so their JSON is serialized
+# once and spliced into every checkpoint. Holds (chunks tuple, pretty, JSON bytes).
+_chunks_json_cache: Tuple[Any, bool, bytes] = ((), False, b"[]")
+_chunks_json_lock = threading.Lock()
+
+# Stand-in for the chunks while the rest of the payload is serialized
+_CHUNKS_PLACEHOLDER = f"__literature_chunks_{uuid.uuid4().hex}__"
+
+_STATE_FIELDS = tuple(EssayState.model_fields)
 
-def save_checkpoint(state: EssayState, checkpoint_dir: Path, step_name: str) -> Path:
+# File buffer for checkpoint writes; large enough that the parts of a
+# checkpoint go to disk in a few big writes
+WRITE_BUFFER_SIZE = 1 << 20
+
+
+def _build_checkpoint_data(state: EssayState, step_name: str) -> Dict[str, Any]:
     """
-    Save an intermediate checkpoint of the essay state.
+    Build the JSON-serialisable checkpoint payload for a state.
     
-    Args:
-        state: Current essay state
-        checkpoint_dir: Directory to save checkpoints
-        step_name: Name of the step (e.g., "outline", "writer", "citation")
-        
-    Returns:
-        Path to the saved checkpoint file
+    State fields are plain JSON types already, so they are read directly
+    rather than copied through model_dump().
     """
-    checkpoint_dir.mkdir(parents=True, exist_ok=True)
-    
-    # Create checkpoint data
-    checkpoint_data = {
+    return {
         "step": step_name,
         "timestamp": datetime.now().isoformat(),
         "revision_count": state.revision_count,
         "review_score": state.review_score,
-        "state": state.model_dump()
+        "state": {name: getattr(state, name) for name in _STATE_FIELDS}
     }
+
+
+def _literature_chunks_json(chunks: Tuple[str, ...], pretty: bool) -> bytes:
+    """Return the checkpoint JSON for the literature chunks, reusing the last result."""
+    global _chunks_json_cache
+    with _chunks_json_lock:
+        cached_chunks, cached_pretty, cached_json = _chunks_json_cache
+        if cached_chunks is chunks and cached_pretty == pretty:
+            return cached_json
+        chunks_json = _dumps(list(chunks), pretty)
+        if pretty:
+            # Indented to sit at checkpoint["state"]["literature_chunks"]; JSON
+            # strings never contain raw newlines, so re-indenting lines is safe
+            chunks_json = chunks_json.replace(b"\n", b"\n    ")
+        _chunks_json_cache = (chunks, pretty, chunks_json)
+        return chunks_json
+
+
+def _write_checkpoint(f: BinaryIO, state: EssayState, step_name: str, pretty: bool = False) -> None:
+    """
+    Write a checkpoint as JSON, reusing the cached literature chunks.
     
-    # Save as JSON
-    checkpoint_file = checkpoint_dir / f"checkpoint_{step_name}_rev{state.revision_count}.json"
-    with open(checkpoint_file, "w", encoding="utf-8") as f:
-        json.dump(checkpoint_data, f, indent=2, ensure_ascii=False)
+    The chunks are written straight from the cache between the surrounding
+    parts of the payload, so the full checkpoint is never joined in memory.
+    """
+    checkpoint_data = _build_checkpoint_data(state, step_name)
+    chunks = state.literature_chunks
+    if not isinstance(chunks, tuple) or not chunks:
+        f.write(_dumps(checkpoint_data, pretty))
+        return
     
-    return checkpoint_file
+    checkpoint_data["state"]["literature_chunks"] = _CHUNKS_PLACEHOLDER
+    head, _, tail = _dumps(checkpoint_data, pretty).partition(f'"{_CHUNKS_PLACEHOLDER}"'.encode("ascii"))
+    f.write(head)
+    f.write(_literature_chunks_json(chunks, pretty))
+    f.write(tail)
 
 
-def save_intermediate_essay(state: EssayState, checkpoint_dir: Path, step_name: str) -> Optional[Path]:
+def save_checkpoint(state: EssayState, checkpoint_dir: Path, step_name: str, pretty: bool = False) -> Path:
     """
-    Save an intermediate version of the essay (if sections are available).
+    Save an intermediate checkpoint of the essay state.
     
     Args:
         state: Current essay state
         checkpoint_dir: Directory to save checkpoints
-        step_name: Name of the step
+        step_name: Name of the step (e.g., "outline", "writer", "citation")
+        pretty: Indent the JSON for reading (default: compact)
         
     Returns:
-        Path to the saved essay file, or None if no sections available
+        Path to the saved checkpoint file
     """
-    if not state.sections:
-        return None
-    
     checkpoint_dir.mkdir(parents=True, exist_ok=True)
     
-    # Build essay from sections
+    # Save as JSON
+    checkpoint_file = checkpoint_dir / f"checkpoint_{step_name}_rev{state.revision_count}.json"
+    with open(checkpoint_file, "wb", buffering=WRITE_BUFFER_SIZE) as f:
+        _write_checkpoint(f, state, step_name, pretty)
+    
+    return checkpoint_file
+
+
+def _build_intermediate_essay(state: EssayState) -> str:
+    """Assemble a Markdown essay from the state's outline, sections and citations."""
     essay_parts = []
     
     # Add title if available
@@ -81,7 +145,28 @@ def save_intermediate_essay(state: EssayState, checkpoint_dir: Path, step_name:
                 title = citation.get("title", "")
                 essay_parts.append(f"- {author} ({year}). {title}\n")
     
-    essay_content = "".join(essay_parts)
+    return "".join(essay_parts)
+
+
+def save_intermediate_essay(state: EssayState, checkpoint_dir: Path, step_name: str) -> Optional[Path]:
+    """
+    Save an intermediate version of the essay (if sections are available).
+    
+    Args:
+        state: Current essay state
+        checkpoint_dir: Directory to save checkpoints
+        step_name: Name of the step
+        
+    Returns:
+        Path to the saved essay file, or None if no sections available
+    """
+    if not state.sections:
+        return None
+    
+    checkpoint_dir.mkdir(parents=True, exist_ok=True)
+    
+    # Build essay from sections
+    essay_content = _build_intermediate_essay(state)
     
     # Save intermediate essay
     essay_file = checkpoint_dir / f"essay_{step_name}_rev{state.revision_count}.md"
@@ -91,6 +176,69 @@ def save_intermediate_essay(state: EssayState, checkpoint_dir: Path, step_name:
     return essay_file
 
 
+def save_checkpoint_batch(
+    state: EssayState,
+    checkpoint_dir: Path,
+    step_name: str,
+    include_essay: bool = True,
+    pretty: bool = False
+) -> Tuple[Path, Optional[Path]]:
+    """
+    Save the state checkpoint and intermediate essay together.
+    
+    Both files are written to temporary names and fsynced, renamed into place
+    atomically, and the renames made durable with a single fsync of the
+    checkpoint directory.
+    
+    Args:
+        state: Current essay state
+        checkpoint_dir: Directory to save checkpoints
+        step_name: Name of the step
+        include_essay: Also save the intermediate essay (if sections are available)
+        pretty: Indent the checkpoint JSON for reading (default: compact)
+        
+    Returns:
+        Tuple of (checkpoint file path, essay file path or None)
+    """
+    checkpoint_dir.mkdir(parents=True, exist_ok=True)
+    
+    checkpoint_file = checkpoint_dir / f"checkpoint_{step_name}_rev{state.revision_count}.json"
+    essay_file = None
+    pending = []
+    
+    tmp_checkpoint = checkpoint_file.with_suffix(".json.tmp")
+    with open(tmp_checkpoint, "wb", buffering=WRITE_BUFFER_SIZE) as f:
+        _write_checkpoint(f, state, step_name, pretty)
+        f.flush()
+        os.fsync(f.fileno())
+    pending.append((tmp_checkpoint, checkpoint_file))
+    
+    if include_essay and state.sections:
+        essay_file = checkpoint_dir / f"essay_{step_name}_rev{state.revision_count}.md"
+        tmp_essay = essay_file.with_suffix(".md.tmp")
+        with open(tmp_essay, "w", encoding="utf-8") as f:
+            f.write(_build_intermediate_essay(state))
+            f.flush()
+            os.fsync(f.fileno())
+        pending.append((tmp_essay, essay_file))
+    
+    for tmp_file, final_file in pending:
+        os.replace(tmp_file, final_file)
+    
+    # The data is on disk; one fsync on the directory persists both renames
+    try:
+        dir_fd = os.open(checkpoint_dir, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+    except OSError:
+        # Directory fsync isn't supported on every platform (e.g. Windows)
+        pass
+    
+    return checkpoint_file, essay_file
+
+
 def load_checkpoint(checkpoint_file: Path) -> Dict[str, Any]:
     """
     Load a checkpoint from a JSON file.
@@ -101,6 +249,7 @@ def load_checkpoint(checkpoint_file: Path) -> Dict[str, Any]:
     Returns:
         Checkpoint data dictionary
     """
-    with open(checkpoint_file, "r", encoding="utf-8") as f:
-        return json.load(f)
+    # Parse the raw bytes in one pass instead of decoding to str first
+    with open(checkpoint_file, "rb") as f:
+        return _loads(f.read())
 
@@ -1,14 +1,33 @@
 """Ollama client wrapper for LLM inference."""
 
+import contextvars
 import json
+import re
 import time
 import requests
-from typing import Dict, Any, Optional, List, TYPE_CHECKING
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import Dict, Any, Optional, List, Union, TYPE_CHECKING
 from pathlib import Path
 
+# Prefer orjson for parsing responses when installed; its JSONDecodeError
+# subclasses json.JSONDecodeError, so error handling is the same either way
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+from src.utils.prompts import build_messages
+
 if TYPE_CHECKING:
     from src.utils.tracking.base_tracker import BaseTracker
 
+# A response wrapped in a Markdown code fence (```json ... ``` or ``` ... ```)
+_JSON_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*(.*?)\s*```\s*$", re.DOTALL)
+
+# Ollama's context window when options has no num_ctx
+DEFAULT_NUM_CTX = 2048
+
 
 class OllamaClient:
     """Wrapper for Ollama API calls with error handling and retry logic."""
@@ -18,7 +37,9 @@ class OllamaClient:
         model: str,
         base_url: str = "http://localhost:11434",
         timeout: int = 900,
-        tracker: Optional["BaseTracker"] = None
+        tracker: Optional["BaseTracker"] = None,
+        max_parallel: int = 1,
+        options: Optional[Dict[str, Any]] = None
     ):
         """
         Initialize Ollama client.
@@ -28,6 +49,10 @@ class OllamaClient:
             base_url: Ollama API base URL
             timeout: Request timeout in seconds
             tracker: Optional tracker instance for observability
+            max_parallel: Maximum concurrent requests agents may issue (match OLLAMA_NUM_PARALLEL)
+            options: Extra Ollama model options sent with every request (e.g. num_ctx, num_batch).
+                Ollama reserves KV cache for num_ctx tokens in each of its OLLAMA_NUM_PARALLEL
+                slots, so keep num_ctx small here and raise it per call where a prompt needs it
         """
         self.model = model
         self.base_url = base_url.rstrip('/')
@@ -35,11 +60,80 @@ class OllamaClient:
         self.api_url = f"{self.base_url}/api/generate"
         self.chat_url = f"{self.base_url}/api/chat"
         self.tracker = tracker
+        self.max_parallel = max(1, max_parallel)
+        self.options = dict(options or {})
+        
+        # One keep-alive connection pool shared by every call (and thread), sized
+        # for the concurrent agent requests plus warmup/health checks. Calls only
+        # go to base_url, so a single host pool serves both schemes.
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_parallel + 2)
+        self._session = requests.Session()
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        
+        # Tracker I/O runs on one background thread so it stays off the request path
+        self._tracker_executor: Optional[ThreadPoolExecutor] = None
+        if tracker is not None and tracker.is_enabled():
+            self._tracker_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm-tracking")
+    
+    @property
+    def num_ctx(self) -> int:
+        """Context window, in tokens, that calls get unless they override it."""
+        return self.options.get("num_ctx", DEFAULT_NUM_CTX)
+    
+    def context_options(self, needed_tokens: int) -> Optional[Dict[str, Any]]:
+        """
+        Per-call options that raise num_ctx to needed_tokens, or None if the default fits.
+        
+        Only calls that need it get the larger window, so the short calls (and the
+        other OLLAMA_NUM_PARALLEL slots) don't reserve KV cache for it.
+        """
+        if needed_tokens <= self.num_ctx:
+            return None
+        # Round up to a multiple of 1024
+        return {"num_ctx": -(-needed_tokens // 1024) * 1024}
+    
+    def close(self) -> None:
+        """Send pending tracking events and close pooled HTTP connections."""
+        if self._tracker_executor is not None:
+            self._tracker_executor.shutdown(wait=True)
+        self._session.close()
     
-    def _check_connection(self) -> bool:
-        """Check if Ollama is running and accessible."""
+    def _track_llm_call(self, **kwargs: Any) -> None:
+        """Hand an LLM call to the tracker without waiting for it."""
+        if self._tracker_executor is None:
+            self.tracker.track_llm_call(**kwargs)
+            return
+        # Run in the caller's context so the call still nests under the current span
+        self._tracker_executor.submit(contextvars.copy_context().run, self.tracker.track_llm_call, **kwargs)
+    
+    def check_connection(self) -> bool:
+        """Check if Ollama is running and accessible (an explicit startup probe)."""
         try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
+            response = self._session.get(f"{self.base_url}/api/tags", timeout=5)
+            return response.status_code == 200
+        except Exception:
+            return False
+    
+    def warmup(self) -> bool:
+        """
+        Load the model into memory with a minimal 1-token generation.
+        
+        Returns:
+            True if the model responded, False otherwise (warmup is best-effort)
+        """
+        try:
+            response = self._session.post(
+                self.api_url,
+                json={
+                    "model": self.model,
+                    "prompt": "hi",
+                    "stream": False,
+                    # Same load-time options as real calls, so the model isn't reloaded
+                    "options": {**self.options, "num_predict": 1}
+                },
+                timeout=self.timeout
+            )
             return response.status_code == 200
         except Exception:
             return False
@@ -63,12 +157,23 @@ class OllamaClient:
         if last_exception:
             raise last_exception
     
+    def _api_error(self, error: requests.exceptions.RequestException) -> ConnectionError:
+        """Wrap a failed request, with a clearer message when Ollama is unreachable."""
+        if isinstance(error, requests.exceptions.ConnectionError):
+            return ConnectionError(
+                f"Cannot connect to Ollama at {self.base_url}. "
+                "Please ensure Ollama is running and the model is available."
+            )
+        return ConnectionError(f"Ollama API error: {str(error)}")
+    
     def generate(
         self,
         prompt: str,
         system: Optional[str] = None,
         temperature: float = 0.7,
         max_tokens: Optional[int] = None,
+        format: Optional[Union[str, Dict[str, Any]]] = None,
+        options: Optional[Dict[str, Any]] = None,
     ) -> str:
         """
         Generate text using Ollama API.
@@ -78,6 +183,8 @@ class OllamaClient:
             system: System prompt (optional)
             temperature: Sampling temperature
             max_tokens: Maximum tokens to generate
+            format: Output constraint: "json" or a JSON Schema (optional)
+            options: Ollama options for this call only, overriding the client's (optional)
             
         Returns:
             Generated text
@@ -86,83 +193,38 @@ class OllamaClient:
             ConnectionError: If Ollama is not accessible
             requests.RequestException: For API errors
         """
-        if not self._check_connection():
-            raise ConnectionError(
-                f"Cannot connect to Ollama at {self.base_url}. "
-                "Please ensure Ollama is running and the model is available."
-            )
-        
-        messages = []
-        if system:
-            messages.append({"role": "system", "content": system})
-        messages.append({"role": "user", "content": prompt})
-        
-        payload = {
-            "model": self.model,
-            "messages": messages,
-            "stream": False,
-            "options": {
-                "temperature": temperature,
-            }
-        }
-        
-        if max_tokens:
-            payload["options"]["num_predict"] = max_tokens
+        payload = self._build_chat_payload(prompt, system, temperature, max_tokens, format=format, options=options)
         
         def _make_request():
-            response = requests.post(
+            response = self._session.post(
                 self.chat_url,
                 json=payload,
                 timeout=self.timeout
             )
             response.raise_for_status()
-            return response.json()
+            return json_loads(response.content)
+        
+        # Built once and shared by the success and error paths
+        full_prompt = self._full_prompt(prompt, system) if self.tracker and self.tracker.is_enabled() else None
         
         try:
-            start_time = time.time()
+            start_time = time.perf_counter()
             result = self._retry_with_backoff(_make_request)
             response_text = result.get("message", {}).get("content", "")
-            latency = time.time() - start_time
+            latency = time.perf_counter() - start_time
             
             # Track LLM call if tracker is available
-            if self.tracker and self.tracker.is_enabled():
-                # Combine system and user prompts for tracking
-                full_prompt = prompt
-                if system:
-                    full_prompt = f"System: {system}\n\nUser: {prompt}"
-                
-                metadata = {
-                    "model": self.model,
-                    "temperature": temperature,
-                    "max_tokens": max_tokens,
-                    "latency_seconds": latency,
-                    "base_url": self.base_url
-                }
-                
-                # Extract token usage if available
-                if "prompt_eval_count" in result:
-                    metadata["prompt_tokens"] = result.get("prompt_eval_count")
-                if "eval_count" in result:
-                    metadata["completion_tokens"] = result.get("eval_count")
-                if "total_duration" in result:
-                    metadata["total_duration_ns"] = result.get("total_duration")
-                
-                self.tracker.track_llm_call(
-                    name="ollama_generate",
-                    prompt=full_prompt,
-                    response=response_text,
-                    metadata=metadata
+            if full_prompt is not None:
+                self._track_response(
+                    "ollama_generate", full_prompt, response_text, result,
+                    latency, temperature, max_tokens
                 )
             
             return response_text
         except requests.exceptions.RequestException as e:
             # Track error if tracker is available
-            if self.tracker and self.tracker.is_enabled():
-                full_prompt = prompt
-                if system:
-                    full_prompt = f"System: {system}\n\nUser: {prompt}"
-                
-                self.tracker.track_llm_call(
+            if full_prompt is not None:
+                self._track_llm_call(
                     name="ollama_generate",
                     prompt=full_prompt,
                     response=f"ERROR: {str(e)}",
@@ -174,7 +236,77 @@ class OllamaClient:
                         "base_url": self.base_url
                     }
                 )
-            raise ConnectionError(f"Ollama API error: {str(e)}")
+            raise self._api_error(e)
+    
+    def _build_chat_payload(
+        self,
+        prompt: str,
+        system: Optional[str],
+        temperature: float,
+        max_tokens: Optional[int],
+        format: Optional[Union[str, Dict[str, Any]]] = None,
+        options: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Build the /api/chat request body."""
+        payload = {
+            "model": self.model,
+            "messages": build_messages(prompt, system),
+            "stream": False,
+            "options": {
+                **self.options,
+                **(options or {}),
+                "temperature": temperature,
+            }
+        }
+        
+        if max_tokens:
+            payload["options"]["num_predict"] = max_tokens
+        
+        if format:
+            payload["format"] = format
+        
+        return payload
+    
+    @staticmethod
+    def _full_prompt(prompt: str, system: Optional[str]) -> str:
+        """Combine system and user prompts for tracking."""
+        if system:
+            return f"System: {system}\n\nUser: {prompt}"
+        return prompt
+    
+    def _track_response(
+        self,
+        name: str,
+        full_prompt: str,
+        response_text: str,
+        result: Dict[str, Any],
+        latency: float,
+        temperature: float,
+        max_tokens: Optional[int]
+    ) -> None:
+        """Send a completed generation, with token usage if reported, to the tracker."""
+        metadata = {
+            "model": self.model,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "latency_seconds": latency,
+            "base_url": self.base_url
+        }
+        
+        # Extract token usage if available
+        if "prompt_eval_count" in result:
+            metadata["prompt_tokens"] = result.get("prompt_eval_count")
+        if "eval_count" in result:
+            metadata["completion_tokens"] = result.get("eval_count")
+        if "total_duration" in result:
+            metadata["total_duration_ns"] = result.get("total_duration")
+        
+        self._track_llm_call(
+            name=name,
+            prompt=full_prompt,
+            response=response_text,
+            metadata=metadata
+        )
     
     def generate_structured(
         self,
@@ -182,15 +314,20 @@ class OllamaClient:
         system: Optional[str] = None,
         temperature: float = 0.3,
         max_tokens: Optional[int] = None,
+        schema: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
         """
         Generate structured JSON output using Ollama API.
         
+        Output is grammar-constrained by Ollama: to the given JSON Schema if one is
+        passed, otherwise to any valid JSON.
+        
         Args:
             prompt: User prompt with JSON format instructions
             system: System prompt (optional)
             temperature: Sampling temperature (lower for structured output)
             max_tokens: Maximum tokens to generate
+            schema: JSON Schema the response must follow (see src.state.schemas)
             
         Returns:
             Parsed JSON dictionary
@@ -200,36 +337,30 @@ class OllamaClient:
             ValueError: If JSON parsing fails
         """
         # Add JSON format instruction to prompt
-        json_prompt = f"{prompt}\n\nRespond with valid JSON only, no additional text."
+        json_prompt = f"{prompt}\n\nRespond with valid JSON only, no markdown fences or additional text."
         
         response_text = self.generate(
             prompt=json_prompt,
             system=system,
             temperature=temperature,
-            max_tokens=max_tokens
+            max_tokens=max_tokens,
+            format=schema or "json"
         )
         
-        # Try to extract JSON from response
-        response_text = response_text.strip()
-        
-        # Remove markdown code blocks if present
-        if response_text.startswith("```json"):
-            response_text = response_text[7:]
-        if response_text.startswith("```"):
-            response_text = response_text[3:]
-        if response_text.endswith("```"):
-            response_text = response_text[:-3]
-        response_text = response_text.strip()
+        full_prompt = self._full_prompt(prompt, system) if self.tracker and self.tracker.is_enabled() else None
         
         try:
-            parsed_json = json.loads(response_text)
+            try:
+                # Constrained output is almost always bare JSON: parse it as is
+                parsed_json = json_loads(response_text)
+            except json.JSONDecodeError:
+                # Remove a markdown code fence if present and retry
+                fence = _JSON_FENCE_RE.match(response_text)
+                response_text = fence.group(1) if fence else response_text.strip()
+                parsed_json = json_loads(response_text)
             
             # Track structured generation if tracker is available
-            if self.tracker and self.tracker.is_enabled():
-                full_prompt = prompt
-                if system:
-                    full_prompt = f"System: {system}\n\nUser: {prompt}"
-                
+            if full_prompt is not None:
                 metadata = {
                     "model": self.model,
                     "temperature": temperature,
@@ -238,22 +369,19 @@ class OllamaClient:
                     "base_url": self.base_url
                 }
                 
-                self.tracker.track_llm_call(
+                self._track_llm_call(
                     name="ollama_generate_structured",
                     prompt=full_prompt,
-                    response=json.dumps(parsed_json, indent=2),
+                    # Already valid JSON; no need to re-encode what was just parsed
+                    response=response_text,
                     metadata=metadata
                 )
             
             return parsed_json
         except json.JSONDecodeError as e:
             # Track parsing error if tracker is available
-            if self.tracker and self.tracker.is_enabled():
-                full_prompt = prompt
-                if system:
-                    full_prompt = f"System: {system}\n\nUser: {prompt}"
-                
-                self.tracker.track_llm_call(
+            if full_prompt is not None:
+                self._track_llm_call(
                     name="ollama_generate_structured",
                     prompt=full_prompt,
                     response=f"PARSE_ERROR: {str(e)}\nResponse: {response_text[:200]}",
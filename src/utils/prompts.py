@@ -1,5 +1,99 @@
 """Prompt templates for all agents in the essay generation pipeline."""
 
+import json
+from functools import lru_cache
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple
+
+__all__ = [
+    "RESEARCH_AGENT_SYSTEM_PROMPT",
+    "OUTLINE_AGENT_SYSTEM_PROMPT",
+    "INITIAL_OUTLINE_SYSTEM_PROMPT",
+    "OUTLINE_REFINEMENT_SYSTEM_PROMPT",
+    "WRITER_AGENT_SYSTEM_PROMPT",
+    "CITATION_AGENT_SYSTEM_PROMPT",
+    "REVIEW_AGENT_SYSTEM_PROMPT",
+    "EDITOR_AGENT_SYSTEM_PROMPT",
+    "RESEARCH_OUTLINE_SYSTEM_PROMPT",
+    "build_messages",
+    "estimate_tokens",
+    "pack_chunks",
+    "iter_sections",
+    "get_research_prompt_for_chunk",
+    "get_research_and_outline_prompt",
+    "get_initial_outline_prompt",
+    "get_outline_refinement_prompt",
+    "get_writer_prompt",
+    "get_writer_batch_prompt",
+    "get_citation_prompt",
+    "get_review_prompt",
+    "iter_editor_prompt",
+    "get_editor_prompt",
+]
+
+
+# Example responses shown in the system prompts. Rendered with json.dumps so
+# the schema text is byte-for-byte stable (the structure itself is enforced
+# through Ollama's format parameter, see src.state.schemas), so values must
+# have the types the schemas declare.
+_RESEARCH_NOTES_EXAMPLE = {
+    "arguments": ["argument 1", "argument 2"],
+    "quotes": [
+        {"text": "quote text", "context": "surrounding context", "source": "author/title if available"}
+    ],
+    "themes": ["theme 1", "theme 2"],
+    "methodologies": ["method 1", "method 2"],
+    "findings": ["finding 1", "finding 2"],
+    "gaps": ["gap 1", "gap 2"]
+}
+
+_OUTLINE_EXAMPLE = {
+    "title": "Essay Title",
+    "sections": [
+        {
+            "name": "Section Name",
+            "subsections": ["Subsection 1", "Subsection 2"],
+            "estimated_words": 1000,
+            "key_points": ["point 1", "point 2"]
+        }
+    ],
+    "total_estimated_words": 5000
+}
+
+_CITATION_EXAMPLE = {
+    "citations": [
+        {
+            "text": "text needing citation",
+            "source": "source identifier",
+            "author": "Author Name",
+            "year": "YYYY",
+            "page": "page number if available"
+        }
+    ],
+    "bibliography": [
+        {
+            "author": "Author, A. A.",
+            "year": "YYYY",
+            "title": "Title",
+            "publisher": "Publisher"
+        }
+    ]
+}
+
+_REVIEW_EXAMPLE = {
+    "score": 0.85,
+    "feedback": ["Feedback point 1", "Feedback point 2"],
+    "strengths": ["strength 1", "strength 2"],
+    "weaknesses": ["weakness 1", "weakness 2"],
+    "weak_sections": ["Section Name"],
+    "meets_criteria": True
+}
+
+
+def _json_structure(example: dict) -> str:
+    """Render the 'Provide a JSON response...' block for a system prompt."""
+    return "Provide a JSON response with the following structure:\n" + json.dumps(example, indent=4)
+
 
 RESEARCH_AGENT_SYSTEM_PROMPT = """You are a ResearchAgent specialized in analyzing academic literature. Your task is to extract key information from research papers and documents.
 
@@ -10,7 +104,9 @@ Extract and organize:
 4. Methodologies and findings
 5. Gaps or limitations mentioned
 
-Be thorough and accurate. Focus on information relevant to the essay topic."""
+Be thorough and accurate. Focus on information relevant to the essay topic.
+
+""" + _json_structure(_RESEARCH_NOTES_EXAMPLE)
 
 
 OUTLINE_AGENT_SYSTEM_PROMPT = """You are an OutlineAgent specialized in creating structured academic essay outlines. Your task is to design a comprehensive outline that addresses the essay topic and meets all evaluation criteria.
@@ -22,7 +118,34 @@ Create a well-organized outline with:
 - Appropriate depth for each section
 - Word count distribution tailored to the target essay length
 
-The outline should be suitable for a PhD-level academic essay. The essay should present original arguments and analysis, not merely summarize research findings. Research findings should be used to support and inform arguments, not drive the structure."""
+The outline should be suitable for a PhD-level academic essay. The essay should present original arguments and analysis, not merely summarize research findings. Research findings should be used to support and inform arguments, not drive the structure.
+
+""" + _json_structure(_OUTLINE_EXAMPLE)
+
+
+INITIAL_OUTLINE_SYSTEM_PROMPT = OUTLINE_AGENT_SYSTEM_PROMPT + """
+
+For this outline, work from the topic and evaluation criteria only. Do NOT consider any research findings at this stage. The outline should:
+1. Be well-structured and logically organized
+2. Address the topic comprehensively
+3. Meet all evaluation criteria
+4. Be tailored to the target word count given
+5. Distribute word counts appropriately across sections
+6. Present a clear argumentative structure
+
+The essay should present original analysis and arguments, not be a summary of research. Structure the outline to support independent critical thinking and argumentation."""
+
+
+OUTLINE_REFINEMENT_SYSTEM_PROMPT = OUTLINE_AGENT_SYSTEM_PROMPT + """
+
+For this outline, refine the given initial outline to incorporate relevant research findings while maintaining its structure and argumentative flow:
+1. Keep the overall structure and section organization from the initial outline
+2. Add research-informed content points where they support the arguments
+3. Ensure the essay remains argument-driven, not research-summary-driven
+4. Use research findings to strengthen and inform arguments, not replace them
+5. Maintain the target word count given
+6. Add specific research points to relevant sections' key_points where appropriate
+7. Do NOT restructure the outline - only enhance it with research-informed details"""
 
 
 WRITER_AGENT_SYSTEM_PROMPT = """You are a WriterAgent specialized in writing academic essays at the PhD level. Your task is to write clear, well-argued, and academically rigorous content.
@@ -38,7 +161,17 @@ Guidelines:
 - Expand on ideas with sufficient depth and detail to meet word count requirements
 - Each section should be comprehensive and thorough
 
-Write content that demonstrates deep understanding and critical analysis. When a word count is specified, you must reach that exact count through detailed, substantive content."""
+Write content that demonstrates deep understanding and critical analysis. When a word count is specified, you must reach that exact count through detailed, substantive content.
+
+For every section:
+- Generate the FULL target word count - do not stop early
+- Use comprehensive, detailed explanations
+- Expand on each key point with sufficient depth
+- Include multiple paragraphs with thorough analysis
+- Use academic language and ensure the content flows logically
+- Include placeholders for citations in the format [AUTHOR, YEAR] where needed
+- Each paragraph should be substantial (150-200 words minimum)
+- Provide detailed examples, evidence, and analysis to reach the word count"""
 
 
 CITATION_AGENT_SYSTEM_PROMPT = """You are a CitationAgent specialized in managing academic citations in APA format. Your task is to identify where citations are needed and format them correctly.
@@ -53,7 +186,14 @@ Identify:
 - Paraphrased ideas that need citations
 - Claims and arguments that need source attribution
 
-Match citations to the appropriate literature sources."""
+Match citations to the appropriate literature sources.
+
+For each citation needed, provide:
+1. The text that needs citation
+2. The source from the literature (match to available sources)
+3. The APA-formatted citation
+
+""" + _json_structure(_CITATION_EXAMPLE)
 
 
 REVIEW_AGENT_SYSTEM_PROMPT = """You are a ReviewAgent specialized in evaluating academic essays. Your task is to assess the essay against the provided evaluation criteria and provide constructive feedback.
@@ -71,7 +211,11 @@ Provide:
 - Specific, actionable feedback points
 - Suggestions for improvement
 
-Be thorough but fair in your assessment."""
+Be thorough but fair in your assessment.
+
+""" + _json_structure(_REVIEW_EXAMPLE) + """
+
+List in "weak_sections" the exact names of the sections that most need revision."""
 
 
 EDITOR_AGENT_SYSTEM_PROMPT = """You are an EditorAgent specialized in formatting and combining academic essay sections. Your PRIMARY task is to preserve ALL content while adding proper structure and formatting.
@@ -96,251 +240,386 @@ DO NOT:
 - Remove details or examples
 - Rewrite sections (only format them)
 
-Your output must contain ALL the original content from all sections, properly formatted."""
-
+Your output must contain ALL the original content from all sections, properly formatted.
 
-def get_research_prompt(topic: str, literature_chunks: list) -> str:
-    """Generate prompt for ResearchAgent."""
-    chunks_text = "\n\n---\n\n".join(literature_chunks[:10])  # Limit to first 10 chunks
-    return f"""Analyze the following literature excerpts related to the topic: "{topic}"
+Document requirements:
+1. Include ALL text from every section - maintain the original word count
+2. Add proper document structure:
+   - Title at the beginning
+   - All sections with proper Markdown headings (## for main sections)
+   - Proper spacing and formatting
+3. Integrate citations: Replace placeholders [AUTHOR, YEAR] with proper inline citations [Author, Year]
+4. Add bibliography section at the end with all cited sources
+5. Ensure consistent academic formatting throughout
+6. Fix only obvious formatting errors (typos, spacing) - do NOT rewrite content
+7. Address review feedback only where it concerns formatting or structure"""
 
-Extract and organize the key information into a structured format.
 
-Literature excerpts:
-{chunks_text}
+RESEARCH_OUTLINE_SYSTEM_PROMPT = """You are a ResearchAgent and OutlineAgent working in a single pass. You perform two independent tasks and return both results in one JSON object.
 
-Provide a JSON response with the following structure:
-{{
-    "arguments": ["argument 1", "argument 2", ...],
-    "quotes": [
-        {{"text": "quote text", "context": "surrounding context", "source": "author/title if available"}},
-        ...
-    ],
-    "themes": ["theme 1", "theme 2", ...],
-    "methodologies": ["method 1", "method 2", ...],
-    "findings": ["finding 1", "finding 2", ...],
-    "gaps": ["gap 1", "gap 2", ...]
-}}"""
+Task 1 - research notes: analyze the literature excerpts and extract key arguments, important quotes, main themes, methodologies, findings, and gaps relevant to the essay topic. Be thorough and accurate.
 
+Task 2 - initial outline: design a well-organized outline for a PhD-level academic essay from the topic and evaluation criteria ONLY. Do NOT base the outline on the literature excerpts; it must present original arguments and analysis with a clear argumentative structure, logical flow, coverage of all criteria, and word counts distributed across sections to match the target length.
 
-def get_initial_outline_prompt(topic: str, criteria: str, target_length: int = 5000) -> str:
-    """Generate prompt for initial outline generation (without research findings)."""
-    return f"""Create a detailed essay outline for the following topic: "{topic}"
+""" + _json_structure({"research_notes": _RESEARCH_NOTES_EXAMPLE, "initial_outline": _OUTLINE_EXAMPLE})
 
-Evaluation criteria:
-{criteria}
 
-IMPORTANT: Generate an outline independently based on the topic and criteria. Do NOT consider any research findings at this stage. The outline should:
-1. Be well-structured and logically organized
-2. Address the topic comprehensively
-3. Meet all evaluation criteria
-4. Be tailored to approximately {target_length} words total
-5. Distribute word counts appropriately across sections
-6. Present a clear argumentative structure
+# The system prompts above hold every fixed instruction and JSON schema, so
+# they form an identical prefix across calls that the server can keep in its
+# KV cache. The builders below emit only the per-call content, most stable
+# parts first and the largest, most variable content last.
 
-The essay should present original analysis and arguments, not be a summary of research. Structure the outline to support independent critical thinking and argumentation.
 
-Provide a JSON response with the following structure:
-{{
-    "title": "Essay Title",
-    "sections": [
-        {{
-            "name": "Section Name",
-            "subsections": ["Subsection 1", "Subsection 2", ...],
-            "estimated_words": 1000,
-            "key_points": ["point 1", "point 2", ...]
-        }},
-        ...
-    ],
-    "total_estimated_words": {target_length}
-}}"""
+@lru_cache(maxsize=16)
+def _system_message(system: str) -> Dict[str, str]:
+    """Build (once per system prompt) the system chat message; callers must not mutate it."""
+    return {"role": "system", "content": system}
 
 
-def get_outline_refinement_prompt(topic: str, criteria: str, initial_outline: dict, research_notes: dict, target_length: int = 5000) -> str:
-    """Generate prompt for refining outline with research findings."""
-    research_summary = f"""
-Research findings (use to inform and support, not drive the structure):
-- Key arguments from literature: {', '.join(research_notes.get('arguments', [])[:8])}
-- Main themes: {', '.join(research_notes.get('themes', [])[:8])}
-- Important findings: {', '.join(research_notes.get('findings', [])[:8])}
-- Methodologies: {', '.join(research_notes.get('methodologies', [])[:5])}
-"""
+def build_messages(prompt: str, system: Optional[str] = None) -> List[Dict[str, str]]:
+    """
+    Build chat messages with the static system prompt first.
     
-    initial_sections = "\n".join([
-        f"- {section.get('name', '')}: {section.get('estimated_words', 0)} words"
-        for section in initial_outline.get('sections', [])
-    ])
+    The system message is sent verbatim, so calls from the same agent share an
+    exact prefix that the server can reuse from its prompt cache. The message
+    dict for each system prompt is built once and shared between calls.
     
-    return f"""Refine the following essay outline by incorporating current academic research findings.
+    Args:
+        prompt: Per-call (dynamic) prompt
+        system: Agent system prompt (optional)
+        
+    Returns:
+        List of chat messages
+    """
+    user_message = {"role": "user", "content": prompt}
+    if system:
+        return [_system_message(system), user_message]
+    return [user_message]
+
+
+def estimate_tokens(*texts: str) -> int:
+    """Estimate the tokens in the given texts at 4 characters per token, as in the PDF chunker."""
+    return sum(len(text) for text in texts) // 4
+
+
+def pack_chunks(literature_chunks: list, budget_tokens: int) -> list:
+    """
+    Take literature chunks, in order, while they fit a token budget.
+    
+    Tokens are counted with estimate_tokens. The first chunk is always kept
+    so the prompt is never left without literature.
+    
+    Args:
+        literature_chunks: Chunks in priority order
+        budget_tokens: Maximum estimated tokens of literature
+        
+    Returns:
+        Leading chunks that fit the budget
+    """
+    packed = []
+    used = 0
+    for chunk in literature_chunks:
+        tokens = estimate_tokens(chunk)
+        if packed and used + tokens > budget_tokens:
+            break
+        packed.append(chunk)
+        used += tokens
+    return packed
+
+
+# User prompt templates, filled with one % operation per call
+_RESEARCH_CHUNK_PROMPT_TEMPLATE = """Analyze the following literature excerpt and extract and organize the key information into a structured format.
+
+Topic: "%(topic)s"
+
+Literature excerpt:
+%(chunk)s"""
+
+_RESEARCH_OUTLINE_PROMPT_TEMPLATE = """Topic: "%(topic)s"
+
+Evaluation criteria:
+%(criteria)s
+
+Target word count: %(target_length)s
+
+Literature excerpts (for the research notes only):
+%(chunks_text)s"""
 
-Topic: "{topic}"
+_INITIAL_OUTLINE_PROMPT_TEMPLATE = """Create a detailed essay outline for the following topic: "%(topic)s"
 
 Evaluation criteria:
-{criteria}
+%(criteria)s
+
+Target word count: %(target_length)s"""
+
+_OUTLINE_REFINEMENT_PROMPT_TEMPLATE = """Refine the following essay outline by incorporating current academic research findings.
+
+Topic: "%(topic)s"
+
+Evaluation criteria:
+%(criteria)s
 
 Initial outline structure:
-{initial_sections}
+%(initial_sections)s
 
-{research_summary}
+%(research_summary)s
 
-TASK: Refine the outline to incorporate relevant research findings while maintaining the original structure and argumentative flow. 
+Target word count: %(target_length)s"""
 
-IMPORTANT GUIDELINES:
-1. Keep the overall structure and section organization from the initial outline
-2. Add research-informed content points where they support the arguments
-3. Ensure the essay remains argument-driven, not research-summary-driven
-4. Use research findings to strengthen and inform arguments, not replace them
-5. Maintain the target word count of approximately {target_length} words
-6. Add specific research points to relevant sections' key_points where appropriate
-7. Do NOT restructure the outline - only enhance it with research-informed details
+_CITATION_PROMPT_TEMPLATE = """Review the following essay sections and identify all places where citations are needed.
 
-Provide a JSON response with the following structure:
-{{
-    "title": "Essay Title",
-    "sections": [
-        {{
-            "name": "Section Name",
-            "subsections": ["Subsection 1", "Subsection 2", ...],
-            "estimated_words": 1000,
-            "key_points": ["point 1", "point 2", "research-informed point", ...]
-        }},
-        ...
-    ],
-    "total_estimated_words": {target_length}
-}}"""
+Essay sections:
+%(sections_text)s"""
 
+_REVIEW_PROMPT_TEMPLATE = """Evaluate the following essay draft against the criteria.
 
-def get_writer_prompt(section_name: str, section_info: dict, research_notes: dict, topic: str) -> str:
-    """Generate prompt for WriterAgent."""
-    key_points = "\n".join([f"- {point}" for point in section_info.get("key_points", [])])
-    relevant_quotes = research_notes.get("quotes", [])[:5]  # Limit quotes
-    quotes_text = "\n".join([f'- "{q.get("text", "")}"' for q in relevant_quotes])
-    target_words = section_info.get('estimated_words', 1000)
+Topic: %(topic)s
+
+Evaluation Criteria:
+%(criteria)s
+
+Essay Content:
+%(essay_content)s"""
+
+
+def get_research_prompt_for_chunk(topic: str, chunk: str) -> str:
+    """Generate prompt for ResearchAgent analysing a single literature chunk."""
+    return _RESEARCH_CHUNK_PROMPT_TEMPLATE % {"topic": topic, "chunk": chunk}
+
+
+def get_research_and_outline_prompt(topic: str, criteria: str, literature_chunks: list, target_length: int = 5000) -> str:
+    """Generate prompt for the combined research notes + initial outline call (pass chunks already packed to fit)."""
+    return _RESEARCH_OUTLINE_PROMPT_TEMPLATE % {
+        "topic": topic,
+        "criteria": criteria,
+        "target_length": target_length,
+        "chunks_text": "\n\n---\n\n".join(literature_chunks),
+    }
+
+
+@lru_cache(maxsize=32)
+def get_initial_outline_prompt(topic: str, criteria: str, target_length: int = 5000) -> str:
+    """Generate prompt for initial outline generation (use with INITIAL_OUTLINE_SYSTEM_PROMPT)."""
+    return _INITIAL_OUTLINE_PROMPT_TEMPLATE % {
+        "topic": topic,
+        "criteria": criteria,
+        "target_length": target_length,
+    }
+
+
+def _leading_unique(items, n: int) -> Tuple[str, ...]:
+    """First n distinct, non-empty entries (whitespace-stripped), in their original order."""
+    return tuple(islice(dict.fromkeys(filter(None, (str(item).strip() for item in items if item))), n))
+
+
+@lru_cache(maxsize=16)
+def _research_summary(
+    arguments: Tuple[str, ...],
+    themes: Tuple[str, ...],
+    findings: Tuple[str, ...],
+    methodologies: Tuple[str, ...]
+) -> str:
+    """Build (and memoize) the research findings block of the refinement prompt."""
+    return f"""
+Research findings (use to inform and support, not drive the structure):
+- Key arguments from literature: {', '.join(arguments)}
+- Main themes: {', '.join(themes)}
+- Important findings: {', '.join(findings)}
+- Methodologies: {', '.join(methodologies)}
+"""
+
+
+def get_outline_refinement_prompt(topic: str, criteria: str, initial_outline: dict, research_notes: dict, target_length: int = 5000) -> str:
+    """Generate prompt for refining outline with research findings (use with OUTLINE_REFINEMENT_SYSTEM_PROMPT)."""
+    research_summary = _research_summary(
+        _leading_unique(research_notes.get('arguments', ()), 8),
+        _leading_unique(research_notes.get('themes', ()), 8),
+        _leading_unique(research_notes.get('findings', ()), 8),
+        _leading_unique(research_notes.get('methodologies', ()), 5)
+    )
+    
+    initial_sections = "\n".join(
+        f"- {section.get('name', '')}: {section.get('estimated_words', 0)} words"
+        for section in initial_outline.get('sections', ())
+    )
     
-    return f"""Write the "{section_name}" section for an academic essay on: "{topic}"
+    return _OUTLINE_REFINEMENT_PROMPT_TEMPLATE % {
+        "topic": topic,
+        "criteria": criteria,
+        "initial_sections": initial_sections,
+        "research_summary": research_summary,
+        "target_length": target_length,
+    }
 
-Section requirements:
-{key_points}
+
+def get_writer_prompt(section_name: str, section_info: dict, research_notes: dict, topic: str) -> str:
+    """
+    Generate prompt for WriterAgent.
+    
+    Only the fields the prompt uses are passed on (as hashable tuples), so
+    rewriting a section with unchanged inputs reuses the cached prompt.
+    """
+    relevant_quotes = islice(research_notes.get("quotes", ()), 5)  # Limit quotes
+    return _writer_prompt(
+        section_name,
+        tuple(map(str, section_info.get("key_points", ()))),
+        tuple(str(q.get("text", "")) for q in relevant_quotes),
+        section_info.get('estimated_words', 1000),
+        topic
+    )
+
+
+# Formatted in one C-level % operation per section. The fixed lead sentence
+# and the topic are shared by every section, so they come first; the
+# per-section content follows and the word-count requirement stays last.
+_WRITER_PROMPT_TEMPLATE = """Write one section of the essay below, using the research evidence where it supports the argument.
+
+Essay topic: "%(topic)s"
 
 Relevant research evidence:
-{quotes_text}
+%(quotes_text)s
 
-CRITICAL: You MUST write EXACTLY {target_words} words for this section. This is a strict requirement.
+Write the "%(section_name)s" section.
 
-Guidelines:
-- Generate the FULL {target_words} words - do not stop early
-- Use comprehensive, detailed explanations
-- Expand on each key point with sufficient depth
-- Include multiple paragraphs with thorough analysis
-- Use academic language and ensure the content flows logically
-- Include placeholders for citations in the format [AUTHOR, YEAR] where needed
-- Each paragraph should be substantial (150-200 words minimum)
-- Provide detailed examples, evidence, and analysis to reach the word count
+Section requirements:
+%(key_points)s
 
-The section must be complete, comprehensive, and reach the target word count of {target_words} words."""
+CRITICAL: You MUST write EXACTLY %(target_words)s words for this section. This is a strict requirement.
+The section must be complete, comprehensive, and reach the target word count of %(target_words)s words."""
 
 
-def get_citation_prompt(sections: dict, literature_chunks: list) -> str:
-    """Generate prompt for CitationAgent."""
-    sections_text = "\n\n---\n\n".join([f"## {name}\n\n{content}" for name, content in sections.items()])
-    
-    return f"""Review the following essay sections and identify all places where citations are needed.
+@lru_cache(maxsize=256)
+def _writer_prompt(
+    section_name: str,
+    key_points: Tuple[str, ...],
+    quotes: Tuple[str, ...],
+    target_words: int,
+    topic: str
+) -> str:
+    """Build (and memoize) the WriterAgent prompt from its hashable inputs."""
+    return _WRITER_PROMPT_TEMPLATE % {
+        "topic": topic,
+        "quotes_text": "\n".join(f'- "{quote}"' for quote in quotes),
+        "section_name": section_name,
+        "key_points": "\n".join(f"- {point}" for point in key_points),
+        "target_words": target_words,
+    }
 
-Essay sections:
-{sections_text}
 
-For each citation needed, provide:
-1. The text that needs citation
-2. The source from the literature (match to available sources)
-3. The APA-formatted citation
+_WRITER_BATCH_SECTION_TEMPLATE = """[SECTION %(index)s] "%(section_name)s"
 
-Provide a JSON response with the following structure:
-{{
-    "citations": [
-        {{
-            "text": "text needing citation",
-            "source": "source identifier",
-            "author": "Author Name",
-            "year": "YYYY",
-            "page": "page number if available"
-        }},
-        ...
-    ],
-    "bibliography": [
-        {{
-            "author": "Author, A. A.",
-            "year": "YYYY",
-            "title": "Title",
-            "publisher": "Publisher"
-        }},
-        ...
-    ]
-}}"""
+Relevant research evidence:
+%(quotes_text)s
 
+Section requirements:
+%(key_points)s
 
-def get_review_prompt(topic: str, criteria: str, essay_content: str) -> str:
-    """Generate prompt for ReviewAgent."""
-    return f"""Evaluate the following essay draft against the criteria.
+Target length: EXACTLY %(target_words)s words."""
 
-Topic: {topic}
+_WRITER_BATCH_PROMPT_TEMPLATE = """Write the following %(count)s sections of the essay below, using the research evidence where it supports the argument.
 
-Evaluation Criteria:
-{criteria}
+Essay topic: "%(topic)s"
 
-Essay Content:
-{essay_content}
+%(sections_text)s
 
-Provide a JSON response with the following structure:
-{{
-    "score": 0.85,
-    "feedback": [
-        "Feedback point 1",
-        "Feedback point 2",
-        ...
-    ],
-    "strengths": ["strength 1", "strength 2", ...],
-    "weaknesses": ["weakness 1", "weakness 2", ...],
-    "meets_criteria": true
-}}"""
+Start each section's text on a new line after its marker, in order: [OUTPUT 1], [OUTPUT 2], and so on. Do not repeat the section names or add anything outside the marked sections.
+
+CRITICAL: You MUST write EXACTLY the target word count of EACH section. This is a strict requirement."""
 
 
-def get_editor_prompt(sections: dict, citations: list, review_feedback: list) -> str:
-    """Generate prompt for EditorAgent."""
-    sections_text = "\n\n".join([f"## {name}\n\n{content}" for name, content in sections.items()])
+def get_writer_batch_prompt(sections: List[Tuple[str, dict, dict]], topic: str) -> str:
+    """
+    Generate one WriterAgent prompt for several sections.
     
-    feedback_text = "\n".join([f"- {fb}" for fb in review_feedback]) if review_feedback else "No specific feedback provided."
+    Sections are numbered from 1 as [SECTION i], and the model is asked to
+    answer with matching [OUTPUT i] markers.
     
-    # Calculate total word count from sections
-    total_words = sum(len(content.split()) for content in sections.values())
+    Args:
+        sections: (section_name, section_info, research_notes) per section, in order
+        topic: Essay topic
+        
+    Returns:
+        Batched writer prompt
+    """
+    sections_text = "\n\n".join(
+        _WRITER_BATCH_SECTION_TEMPLATE % {
+            "index": index,
+            "section_name": section_name,
+            "quotes_text": "\n".join(
+                f'- "{quote.get("text", "")}"' for quote in islice(research_notes.get("quotes", ()), 5)
+            ),
+            "key_points": "\n".join(f"- {point}" for point in section_info.get("key_points", ())),
+            "target_words": section_info.get("estimated_words", 1000),
+        }
+        for index, (section_name, section_info, research_notes) in enumerate(sections, 1)
+    )
+    return _WRITER_BATCH_PROMPT_TEMPLATE % {
+        "count": len(sections),
+        "topic": topic,
+        "sections_text": sections_text,
+    }
+
+
+def iter_sections(sections: dict, separator: str) -> Iterator[str]:
+    """
+    Yield sections as "## name" headed Markdown, in fragments.
     
-    return f"""Format and combine the following essay sections into a final, cohesive document.
+    Section texts are yielded as they are, so joining the fragments copies
+    each one only once, into the result.
+    
+    Args:
+        sections: Mapping of section name to content
+        separator: Text placed between consecutive sections
+    """
+    heading = separator + "## "
+    for i, (name, content) in enumerate(sections.items()):
+        yield heading if i else "## "
+        yield name
+        yield "\n\n"
+        yield content
 
-CRITICAL: You MUST preserve ALL content from every section. Do NOT summarize, compress, shorten, or omit any text.
 
-Sections to format (PRESERVE ALL CONTENT):
-{sections_text}
+def get_citation_prompt(sections: dict, literature_chunks: list) -> str:
+    """Generate prompt for CitationAgent."""
+    sections_text = "".join(iter_sections(sections, "\n\n---\n\n"))
+    return _CITATION_PROMPT_TEMPLATE % {"sections_text": sections_text}
+
+
+def get_review_prompt(topic: str, criteria: str, essay_content: str) -> str:
+    """Generate prompt for ReviewAgent."""
+    return _REVIEW_PROMPT_TEMPLATE % {
+        "topic": topic,
+        "criteria": criteria,
+        "essay_content": essay_content,
+    }
+
+
+def iter_editor_prompt(sections: dict, citations: list, review_feedback: list, total_words: Optional[int] = None) -> Iterator[str]:
+    """
+    Yield the EditorAgent prompt in fragments (pass total_words if already counted).
+    
+    The section texts are yielded as they are, so no intermediate copy of
+    the essay is built before the final prompt.
+    """
+    feedback_text = "\n".join(f"- {fb}" for fb in review_feedback) if review_feedback else "No specific feedback provided."
+    
+    # Calculate total word count from sections
+    if total_words is None:
+        total_words = sum(len(content.split()) for content in sections.values())
+    
+    yield f"""Format and combine the following essay sections into a final, cohesive document.
 
 Review feedback to consider (address formatting/structure only):
 {feedback_text}
 
-TASK: Format and structure the document while preserving ALL original content.
+The sections total ~{total_words} words; your output must contain the COMPLETE text of every section.
 
-Requirements:
-1. Include ALL text from every section - maintain the original word count (~{total_words} words)
-2. Add proper document structure:
-   - Title at the beginning
-   - All sections with proper Markdown headings (## for main sections)
-   - Proper spacing and formatting
-3. Integrate citations: Replace placeholders [AUTHOR, YEAR] with proper inline citations [Author, Year]
-4. Add bibliography section at the end with all cited sources
-5. Ensure consistent academic formatting throughout
-6. Fix only obvious formatting errors (typos, spacing) - do NOT rewrite content
-
-DO NOT:
-- Summarize or compress any section
-- Remove any content or details
-- Reduce word count
-- Rewrite sections (only format them)
+Sections to format (PRESERVE ALL CONTENT):
+"""
+    yield from iter_sections(sections, "\n\n")
 
-Your output must contain the COMPLETE text from all sections, properly formatted and structured."""
 
+def get_editor_prompt(sections: dict, citations: list, review_feedback: list, total_words: Optional[int] = None) -> str:
+    """Generate prompt for EditorAgent (pass total_words if already counted)."""
+    # One join over the fragments: the essay text is copied only into the result
+    return "".join(iter_editor_prompt(sections, citations, review_feedback, total_words))
@@ -83,4 +83,7 @@ class BaseTracker(ABC):
             metadata: Optional metadata (model, temperature, tokens, etc.)
         """
         pass
-
+    
+    def shutdown(self) -> None:
+        """Flush any buffered tracking data before the process exits."""
+        pass
@@ -1,11 +1,43 @@
 """Langfuse implementation of BaseTracker for cloud-hosted tracking."""
 
+import atexit
+import logging
 import os
-from typing import Dict, Any, Optional
+import queue
+import threading
+import time
+from typing import Dict, Any, Optional, Tuple
 from contextlib import contextmanager
 from langfuse import Langfuse
 from src.utils.tracking.base_tracker import BaseTracker
 
+logger = logging.getLogger(__name__)
+
+
+# Minimum seconds between background flushes; shutdown() always flushes
+FLUSH_INTERVAL_SECONDS = 5.0
+
+# Langfuse clients shared by trackers with the same credentials, so they
+# reuse one HTTP connection pool and background exporter
+_clients: Dict[Tuple[str, str, str, int, float], Langfuse] = {}
+_clients_lock = threading.Lock()
+
+
+def _get_client(public_key: str, secret_key: str, host: str, flush_at: int, flush_interval: float) -> Langfuse:
+    """Return the process-wide Langfuse client for these settings, creating it once."""
+    key = (public_key, secret_key, host, flush_at, flush_interval)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = Langfuse(
+                public_key=public_key,
+                secret_key=secret_key,
+                host=host,
+                flush_at=flush_at,
+                flush_interval=flush_interval
+            )
+        return client
+
 
 class LangfuseTracker(BaseTracker):
     """Simplified Langfuse cloud-hosted tracking implementation using context managers."""
@@ -15,18 +47,26 @@ class LangfuseTracker(BaseTracker):
         public_key: Optional[str] = None,
         secret_key: Optional[str] = None,
         host: str = "https://cloud.langfuse.com",
-        enabled: bool = True
+        enabled: bool = True,
+        flush_at: int = 50,
+        flush_interval: float = 10.0
     ):
         """
         Initialize Langfuse tracker.
         
+        Events are batched by the SDK's background exporter; flushes requested
+        at trace boundaries run on a worker thread and never block the caller.
+        
         Args:
             public_key: Langfuse public key (or from LANGFUSE_PUBLIC_KEY env var)
             secret_key: Langfuse secret key (or from LANGFUSE_SECRET_KEY env var)
             host: Langfuse host URL
             enabled: Whether tracking is enabled
+            flush_at: Events the SDK batches before exporting
+            flush_interval: Seconds between the SDK's background exports
         """
         self._enabled = enabled
+        self._pending_trace_metadata = []
         
         if not enabled:
             self._client = None
@@ -45,50 +85,129 @@ class LangfuseTracker(BaseTracker):
             return
         
         try:
-            self._client = Langfuse(
-                public_key=public_key,
-                secret_key=secret_key,
-                host=host
-            )
+            self._client = _get_client(public_key, secret_key, host, flush_at, flush_interval)
+            # Bound once; used for every trace, span and generation
+            self._start_observation = self._client.start_as_current_observation
+            logger.debug("Langfuse tracker initialized (host=%s)", host)
             self._current_trace_context = None
+            
+            # Flushes run on a daemon thread so network I/O stays off the pipeline's path
+            self._flush_queue = queue.Queue()
+            self._flush_thread = threading.Thread(target=self._flush_worker, daemon=True)
+            self._flush_thread.start()
+            self._last_flush_request = float("-inf")
+            
+            # Send whatever a debounced flush left behind if shutdown() is never called
+            atexit.register(self.shutdown)
         except Exception as e:
             # If initialization fails, disable tracking
-            print(f"Warning: Failed to initialize Langfuse tracker: {str(e)}")
+            logger.warning("Failed to initialize Langfuse tracker: %s", e)
             self._enabled = False
             self._client = None
             self._current_trace_context = None
     
     def is_enabled(self) -> bool:
         """Check if tracking is enabled."""
-        return self._enabled and self._client is not None
+        # __init__ clears _enabled on every path that leaves _client unset
+        return self._enabled
+    
+    def _flush_worker(self) -> None:
+        """Consume flush requests from the queue until a shutdown sentinel arrives."""
+        while True:
+            item = self._flush_queue.get()
+            stop = item is None
+            
+            # Coalesce requests that piled up while the previous flush was running
+            pending = 0
+            while not stop:
+                try:
+                    stop = self._flush_queue.get_nowait() is None
+                    pending += 1
+                except queue.Empty:
+                    break
+            
+            try:
+                self._client.flush()
+            except Exception as e:
+                logger.warning("Failed to flush Langfuse events: %s", e)
+            finally:
+                for _ in range(pending + 1):
+                    self._flush_queue.task_done()
+            
+            if stop:
+                return
+    
+    def _request_flush(self) -> None:
+        """
+        Schedule a flush on the background worker and return immediately.
+        
+        Requests within FLUSH_INTERVAL_SECONDS of the last one are skipped; the
+        SDK keeps exporting in the background and shutdown() sends the rest.
+        """
+        now = time.monotonic()
+        if now - self._last_flush_request < FLUSH_INTERVAL_SECONDS:
+            return
+        self._last_flush_request = now
+        self._flush_queue.put(True)
+    
+    def shutdown(self) -> None:
+        """Drain pending flushes and stop the background worker."""
+        if not self._enabled or not self._flush_thread.is_alive():
+            return
+        self._flush_queue.put(None)
+        self._flush_thread.join()
     
     @contextmanager
-    def trace_context(self, name: str, metadata: Optional[Dict[str, Any]] = None):
-        """Context manager for a trace (root span)."""
-        if not self.is_enabled():
+    def trace_context(
+        self,
+        name: str,
+        metadata: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Context manager for a trace (root span).
+        
+        Args:
+            name: Trace name
+            metadata: Optional metadata dictionary
+        """
+        if not self._enabled:
             yield None
             return
         
         try:
-            with self._client.start_as_current_observation(
+            with self._start_observation(
                 as_type="span",
                 name=name,
-                metadata=metadata or {}
+                metadata=metadata
             ) as trace:
                 self._current_trace_context = trace
+                self._pending_trace_metadata = []
                 try:
                     yield trace
                 finally:
+                    # Send all buffered metadata as a single trace update
+                    if self._pending_trace_metadata:
+                        merged = {}
+                        for metadata in self._pending_trace_metadata:
+                            merged.update(metadata)
+                        self._pending_trace_metadata = []
+                        trace.update(metadata=merged)
                     self._current_trace_context = None
-                    self._client.flush()
+                    self._request_flush()
         except Exception as e:
-            print(f"Warning: Failed to create trace: {str(e)}")
+            logger.warning("Failed to create trace: %s", e)
             yield None
     
+    def buffer_update(self, metadata: Dict[str, Any]) -> None:
+        """Buffer trace metadata; it is sent in one update when the trace context exits."""
+        if not self._enabled or self._current_trace_context is None:
+            return
+        self._pending_trace_metadata.append(metadata)
+    
     def start_trace(self, name: str, metadata: Optional[Dict[str, Any]] = None) -> Optional[str]:
         """Start a workflow trace. Returns a context manager."""
         # This method is kept for compatibility but should use trace_context() instead
-        if not self.is_enabled():
+        if not self._enabled:
             return None
         # Return a placeholder - actual trace management should use trace_context()
         return "trace_active"
@@ -96,39 +215,39 @@ class LangfuseTracker(BaseTracker):
     def end_trace(self, trace_id: Optional[str], metadata: Optional[Dict[str, Any]] = None) -> None:
         """End a workflow trace."""
         # This is handled automatically by context manager
-        if self.is_enabled():
-            self._client.flush()
+        if self._enabled:
+            self._request_flush()
     
     @contextmanager
     def span_context(self, name: str, metadata: Optional[Dict[str, Any]] = None):
         """Context manager for an agent span."""
-        if not self.is_enabled():
+        if not self._enabled:
             yield None
             return
         
         try:
-            with self._client.start_as_current_observation(
+            with self._start_observation(
                 as_type="span",
                 name=name,
-                metadata=metadata or {}
+                metadata=metadata
             ) as span:
                 yield span
         except Exception as e:
-            print(f"Warning: Failed to create span: {str(e)}")
+            logger.warning("Failed to create span: %s", e)
             yield None
     
     def start_span(self, name: str, parent_id: Optional[str] = None, metadata: Optional[Dict[str, Any]] = None) -> Optional[str]:
         """Start an agent span. Returns span ID for compatibility."""
-        if not self.is_enabled():
+        if not self._enabled:
             return None
         # Return placeholder - actual span management should use span_context()
         return f"span_{name}"
     
     def end_span(self, span_id: Optional[str], metadata: Optional[Dict[str, Any]] = None) -> None:
         """End an agent span."""
-        # This is handled automatically by context manager
-        if self.is_enabled():
-            self._client.flush()
+        # This is handled automatically by context manager; events are
+        # flushed when the trace ends (or on shutdown)
+        pass
     
     def track_llm_call(
         self,
@@ -139,31 +258,25 @@ class LangfuseTracker(BaseTracker):
         metadata: Optional[Dict[str, Any]] = None
     ) -> None:
         """Track an LLM API call."""
-        if not self.is_enabled():
+        if not self._enabled:
             return
         
         try:
-            metadata = metadata or {}
             # Get model from metadata (don't pop to avoid modifying original)
-            model = metadata.get("model", "unknown")
+            model = metadata.get("model", "unknown") if metadata else "unknown"
             
-            # All metadata (including temperature, max_tokens) goes in the metadata dict
-            # Langfuse will handle temperature/max_tokens from metadata
-            generation_metadata = metadata.copy()
-            
-            # Create generation observation - all config goes in metadata
-            with self._client.start_as_current_observation(
+            # Create generation observation - all config (including temperature,
+            # max_tokens) goes in the metadata dict, which is only read here
+            with self._start_observation(
                 as_type="generation",
                 name=name,
                 model=model,
                 input=prompt,
                 output=response,
-                metadata=generation_metadata
+                metadata=metadata
             ):
                 pass  # Context manager handles the observation lifecycle
-            
-            # Flush to ensure data is sent
-            self._client.flush()
+            # Sent with the rest of the trace when it ends (or on shutdown)
         except Exception as e:
-            print(f"Warning: Failed to track LLM call: {str(e)}")
+            logger.warning("Failed to track LLM call: %s", e)
 